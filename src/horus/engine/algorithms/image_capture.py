@@ -63,13 +63,28 @@ class CameraSettings(object):
         except IndexError:
             pass
 
+    def get_state(self):
+        # Settings affecting captured image
+        return (self.brightness, self.contrast, self.saturation, self.exposure,
+                tuple(self.light))
+
     def send_all_settings(self):
-        self.driver.camera.set_brightness(self.brightness)
-        self.driver.camera.set_contrast(self.contrast)
-        self.driver.camera.set_saturation(self.saturation)
-        self.driver.camera.set_exposure(self.exposure)
+        # Driver skips values already applied
+        #   returns {control: apply time} of changed controls
+        camera = self.driver.camera
+        controls = [('brightness', camera.set_brightness, self.brightness),
+                    ('contrast', camera.set_contrast, self.contrast),
+                    ('saturation', camera.set_saturation, self.saturation),
+                    ('exposure', camera.set_exposure, self.exposure)]
         for idx,br in enumerate(self.light):
-            self.driver.camera.set_light(idx,br)
+            controls.append(('light{0}'.format(idx),
+                             lambda value, idx=idx: camera.set_light(idx, value), br))
+        changed = {}
+        for name, setter, value in controls:
+            begin = time.time()
+            if setter(value):
+                changed[name] = time.time() - begin
+        return changed
 
     def read_profile(self, mode):
         self.set_brightness(profile.settings['brightness_'+mode])
@@ -105,6 +120,15 @@ class ImageCapture(object):
         self._mode.selected = True
         self._remove_background = True
         self._updating = False
+        # Apply time of camera controls (s)
+        self.control_latency = {}
+
+        # Background reuse: 'Never', 'Steps', 'Difference', 'Texture'
+        self.background_policy = 'Never'
+        self.background_steps = 1
+        self.background_threshold = 0
+        self._difference_fallback = False
+        self.reset_background()
 
     def initialize(self):
         self.texture_mode.initialize()
@@ -126,24 +150,53 @@ class ImageCapture(object):
     def set_remove_background(self, value):
         self._remove_background = value
 
+    def set_background_policy(self, value, steps=1, threshold=0):
+        # 'Never' - capture background for each laser capture
+        # 'Steps' - reuse background for given number of captures
+        # 'Difference' - reuse while texture changes less than threshold
+        # 'Texture' - use texture as background when camera settings match
+        self.background_policy = value
+        self.background_steps = steps
+        self.background_threshold = threshold
+        self._difference_fallback = False
+        self.reset_background()
+
+    def reset_background(self):
+        self._background = None
+        self._background_state = None
+        self._background_age = 0
+        self._background_texture = None
+        self._texture = None
+
     def set_mode(self, mode):
         if self._mode is not mode:
             self._updating = True
             self._mode.selected = False
             self._mode = mode
             self._mode.selected = True
-            self._mode.send_all_settings()
+            changed = self._mode.send_all_settings()
             # wait for camera to adjust to new settings
-            if self.stream:
-                flush = self._flush_stream_mode
-            else:
-                flush = self._flush_mode
-            if flush > 0:
-                self.capture_image(flush-1)
-            else:
-                self.capture_image(flush)
+            if changed:
+                if self.stream:
+                    flush = self._flush_stream_mode
+                else:
+                    flush = self._flush_mode
+                flush += self._stall_frames(changed)
+                # Frame is dropped, skip color conversion
+                if flush > 0:
+                    self.capture_image(flush-1, rgb=False)
+                else:
+                    self.capture_image(flush, rgb=False)
             self._updating = False
 
+    def _stall_frames(self, changed):
+        # Frames exposed while changed controls were being applied
+        for name, elapsed in changed.items():
+            latency = self.control_latency.get(name, elapsed)
+            self.control_latency[name] = 0.8 * latency + 0.2 * elapsed
+        latency = max(self.control_latency[name] for name in changed)
+        return int(latency * self.driver.camera.get_frame_rate())
+
     def set_mode_texture(self):
         self.set_mode(self.texture_mode)
 
@@ -172,6 +225,50 @@ class ImageCapture(object):
         else:
             flush = self._flush_texture
         image = self.capture_image(flush=flush)
+        # Keep for background reuse
+        self._texture = image
+        return image
+
+    def _capture_background(self):
+        # Laser off image in laser mode, reused according to policy
+        self.set_mode(self.laser_mode)
+        self.driver.board.lasers_off()
+        state = self.laser_mode.get_state()
+        texture, self._texture = self._texture, None
+        policy = self.background_policy
+
+        if policy == 'Difference' and texture is None:
+            # No texture taken for this capture to compare with
+            if not self._difference_fallback:
+                logger.warning("Background reuse 'Difference' needs a texture "
+                               "for each capture, using 'Steps'")
+                self._difference_fallback = True
+            policy = 'Steps'
+
+        if policy == 'Texture' and texture is not None and \
+           state == self.texture_mode.get_state():
+            return texture
+
+        if self._background is not None and self._background_state == state:
+            if policy == 'Steps' and self._background_age < self.background_steps:
+                self._background_age += 1
+                return self._background
+            if policy == 'Difference' and texture is not None and \
+               self._background_texture is not None and \
+               texture.shape == self._background_texture.shape and \
+               np.mean(cv2.absdiff(texture, self._background_texture)) < self.background_threshold:
+                return self._background
+
+        if self.stream:
+            flush = self._flush_stream_laser
+        else:
+            flush = self._flush_laser
+        image = self.capture_image(flush=flush)
+        if policy != 'Never':
+            self._background = image
+            self._background_state = state
+            self._background_age = 0
+            self._background_texture = texture
         return image
 
     def _capture_laser(self, index):
@@ -189,7 +286,7 @@ class ImageCapture(object):
             try:
                 if self._mode.laser_bg[index] is not None and \
                    image is not None:
-                    image = cv2.subtract(image, self._mode.laser_bg[index])
+                    cv2.subtract(image, self._mode.laser_bg[index], image)
             except:
                 logger.info('WARNING: Error applying laser BG @ image_capture._capture_laser')
         return image
@@ -199,17 +296,12 @@ class ImageCapture(object):
         image_background = None
         self.set_mode(self.laser_mode)
         if self._remove_background:
-            self.driver.board.lasers_off()
-            if self.stream:
-                flush = self._flush_stream_laser
-            else:
-                flush = self._flush_laser
-            image_background = self.capture_image(flush=flush)
+            image_background = self._capture_background()
         # Capture laser
         image = self._capture_laser(index)
         if image_background is not None:
             if image is not None:
-                image = cv2.subtract(image, image_background)
+                cv2.subtract(image, image_background, image)
         return [image, image_background]
 
     def capture_lasers(self):
@@ -219,12 +311,7 @@ class ImageCapture(object):
         image_background = None
         self.set_mode(self.laser_mode)
         if self._remove_background:
-            self.driver.board.lasers_off()
-            if self.stream:
-                flush = self._flush_stream_laser
-            else:
-                flush = self._flush_laser
-            image_background = self.capture_image(flush=flush)
+            image_background = self._capture_background()
         # Capture lasers
         images = []
         for i in range(len(self.calibration_data.laser_planes)):
@@ -247,7 +334,9 @@ class ImageCapture(object):
         #print "capture lasers bg subtract: {0} ms".format(int((time.time() - tbegin) * 1000))
         return images
 
-    def capture_all_lasers(self):
+    def capture_all_lasers(self, background=False):
+        # All lasers in one exposure
+        #   background - return [image, image_background]
         image_background = None
         self.set_mode(self.laser_mode)
         if self.stream:
@@ -255,8 +344,7 @@ class ImageCapture(object):
         else:
             flush = self._flush_laser
         if self._remove_background:
-            self.driver.board.lasers_off()
-            image_background = self.capture_image(flush=flush)
+            image_background = self._capture_background()
         self.driver.board.lasers_on()
         image = self.capture_image(flush=flush)
         self.driver.board.lasers_off()
@@ -274,9 +362,11 @@ class ImageCapture(object):
                 if image is not None:
                     for bg in self._mode.laser_bg:
                         if bg is not None:
-                            image = cv2.subtract(image, bg)
+                            cv2.subtract(image, bg, image)
             except:
                 logger.info('WARNING: Error applying laser BG @ image_capture.capture_all_lasers')
+        if background:
+            return [image, image_background]
         return image
 
     def capture_pattern(self):
@@ -288,8 +378,8 @@ class ImageCapture(object):
         image = self.capture_image(flush=flush)
         return image
 
-    def capture_image(self, flush=0):
-        image = self.driver.camera.capture_image(flush=flush)
+    def capture_image(self, flush=0, rgb=True):
+        image = self.driver.camera.capture_image(flush=flush, rgb=rgb)
         return image
 
     def remove_background_subtract(self,images):
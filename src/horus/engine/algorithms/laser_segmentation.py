@@ -8,7 +8,6 @@ __license__ = 'GNU General Public License v2 http://www.gnu.org/licenses/gpl2.ht
 import cv2
 import math
 import numpy as np
-import scipy.ndimage
 
 from horus import Singleton
 from horus.engine.calibration.calibration_data import CalibrationData
@@ -33,6 +32,8 @@ class LaserSegmentation(object):
         self.window_enable = False
         self.window_value = 0
         self.refinement_method = 'SGF'
+        self.roi_crop = True
+        self.peak_kernel = 'Index vector'
 
     def read_profile(self, mode):
         self.laser_color_detector = profile.settings['laser_color_detector_'+mode]
@@ -43,6 +44,8 @@ class LaserSegmentation(object):
         self.window_enable = profile.settings['window_enable_'+mode]
         self.window_value = profile.settings['window_value_'+mode]
         self.refinement_method = profile.settings['refinement_'+mode]
+        self.roi_crop = profile.settings['segmentation_roi_crop']
+        self.peak_kernel = profile.settings['peak_kernel']
 
     def set_laser_color_detector(self, value):
         self.laser_color_detector = value
@@ -68,13 +71,34 @@ class LaserSegmentation(object):
     def set_refinement_method(self, value):
         self.refinement_method = value
 
-    def compute_2d_points(self, image):
+    def set_roi_crop(self, value):
+        self.roi_crop = value
+
+    def set_peak_kernel(self, value):
+        self.peak_kernel = value
+
+    def compute_2d_points(self, image, index=None, exclusive=False):
+        # index - laser index to limit detection to ROI area seen on laser plane
+        # exclusive - skip areas seen by other lasers (all lasers in one image)
         if image is not None:
-            image = self.compute_line_segmentation(image)
-            # Peak detection: center of mass
-            s = image.sum(axis=1)
-            v = np.where(s > 0)[0]
-            u = (self.calibration_data.weight_matrix * image).sum(axis=1)[v] / s[v]
+            shape = image.shape
+            points_2d, image, offset = self.compute_2d_points_cropped(image, index, exclusive)
+            return points_2d, self._uncrop_image(image, shape, offset)
+
+    def compute_2d_points_cropped(self, image, index=None, exclusive=False):
+        # Same as compute_2d_points, laser image is not placed into full frame
+        #   returns (u, v), ROI laser image and its (u, v) offset in source image
+        if image is not None:
+            image, (du, dv) = self._compute_line_segmentation(image, index, exclusive)
+            if self.refinement_method in ('Parabolic', 'Gaussian', 'Blais-Rioux'):
+                # Peak detection: sub-pixel estimator around row maximum
+                s, v, u = self._subpixel_peak(image)
+            else:
+                # Peak detection: center of mass
+                s, v, u = self._center_of_mass(image)
+            # Move to full image coords
+            u += du
+            v += dv
             if self.refinement_method == 'SGF':
                 # Segmented gaussian filter
                 u = self._sgf(u, s)
@@ -83,7 +107,9 @@ class LaserSegmentation(object):
                 u = self._ransac(u, v)
             # Saturate u
             u = np.clip(u, 0, self.calibration_data.width - 1)
-            return (u, v), image
+            # Drop points outside ROI
+            u, v = self.point_cloud_roi.mask_points_2d((u, v), index, exclusive)
+            return (u, v), image, (du, dv)
 
     def compute_hough_lines(self, image):
         if image is not None:
@@ -96,14 +122,47 @@ class LaserSegmentation(object):
             #   u2 = u1 - height * np.tan(theta)
             return lines
 
-    def compute_line_segmentation(self, image):
+    def compute_line_segmentation(self, image, index=None):
         if image is not None:
+            shape = image.shape
+            image, offset = self._compute_line_segmentation(image, index)
+            return self._uncrop_image(image, shape, offset)
+
+    def _compute_line_segmentation(self, image, index=None, exclusive=False):
+        # Segment laser line within ROI
+        #   returns laser image and its (u, v) offset in source image
+        if self.roi_crop:
+            # Process ROI view only
+            image, offset = self.point_cloud_roi.crop_image(image, index, exclusive)
+        else:
             # Apply ROI mask
-            image = self.point_cloud_roi.mask_image(image)
+            image, offset = self.point_cloud_roi.mask_image(image), (0, 0)
+        if image.size == 0:
+            return np.zeros(image.shape[:2], np.uint8), offset
+        if image.ndim == 3:
+            # Compact captures are already reduced to detector plane
             image = self._obtain_laser_image(image)
-            image = self._threshold_image(image)
-            image = self._window_mask(image)
+        # Apply laser plane ROI bounds
+        image = self.point_cloud_roi.mask_laser_image(image, offset, index, exclusive)
+        image = self._threshold_image(image)
+        image = self._window_mask(image)
+        return image, offset
+
+    def _uncrop_image(self, image, shape, offset):
+        # Place ROI laser image into full size frame
+        h, w = image.shape
+        if (h, w) == shape[:2]:
             return image
+        du, dv = offset
+        ret = np.zeros(shape[:2], np.uint8)
+        ret[dv:dv + h, du:du + w] = image
+        return ret
+
+    def compute_laser_plane(self, image, dst=None):
+        # Single detector plane of laser image
+        #   dst - buffer for channel detectors
+        if image is not None:
+            return self._obtain_laser_image(image, dst)
 
     def compute_line_segmentation_bg(self, image, avoid_platform = False):
         mask = image.copy()
@@ -118,44 +177,103 @@ class LaserSegmentation(object):
 
         return image
 
-    def _obtain_laser_image(self, image):
+    def _obtain_laser_image(self, image, dst=None):
+        # Extract single laser plane, no full frame split
         ret = None
         if self.laser_color_detector == 'R (RGB)':
-            ret = cv2.split(image)[0]
+            ret = cv2.extractChannel(image, 0, dst)
 
         elif self.laser_color_detector == 'G (RGB)':
-            ret = cv2.split(image)[1]
+            ret = cv2.extractChannel(image, 1, dst)
 
         elif self.laser_color_detector == 'B (RGB)':
-            ret = cv2.split(image)[2]
+            ret = cv2.extractChannel(image, 2, dst)
 
         elif self.laser_color_detector == 'R (HSV)':
-            ret = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+            hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
             # lower mask (0-10)
             # TODO Use separate threshold value or 0 for 'V'
             lower_red = np.array([0,50,self.threshold_value])
             upper_red = np.array([10,255,255])
-            mask0 = cv2.inRange(ret, lower_red, upper_red)
+            mask = cv2.inRange(hsv, lower_red, upper_red)
 
             # upper mask (170-180)
             lower_red = np.array([160,50,self.threshold_value])
             upper_red = np.array([180,255,255])
-            mask1 = cv2.inRange(ret, lower_red, upper_red)
-
             # join masks
-            mask = mask0+mask1
+            mask = cv2.bitwise_or(mask, cv2.inRange(hsv, lower_red, upper_red))
 
-            ret = cv2.split(ret)[2]
-            ret[np.where(mask==0)] = 0
+            ret = cv2.bitwise_and(cv2.extractChannel(hsv, 2), mask)
 
         elif self.laser_color_detector == 'Cr (YCrCb)':
-            ret = cv2.split(cv2.cvtColor(image, cv2.COLOR_RGB2YCR_CB))[1]
+            ret = cv2.extractChannel(cv2.cvtColor(image, cv2.COLOR_RGB2YCR_CB), 1)
 
         elif self.laser_color_detector == 'U (YUV)':
-            ret = cv2.split(cv2.cvtColor(image, cv2.COLOR_RGB2YUV))[1]
+            ret = cv2.extractChannel(cv2.cvtColor(image, cv2.COLOR_RGB2YUV), 1)
 
         return ret
 
+    def _center_of_mass(self, image):
+        # Center of mass of each row
+        #   returns row sums, rows with s > 0 and their u
+        if self.peak_kernel == 'Weight matrix':
+            h, w = image.shape
+            s = image.sum(axis=1)
+            v = np.where(s > 0)[0]
+            u = (self.calibration_data.weight_matrix[:h, :w] * image).sum(axis=1)[v] / s[v]
+        else:
+            s = cv2.reduce(image, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+            v = np.where(s > 0)[0]
+            u = self._weighted_row_sum(image)[v] / s[v]
+        return s, v, u
+
+    def _weighted_row_sum(self, image, chunk=64):
+        # Dot product of each row with column index vector
+        # processed in row chunks to avoid full frame temporary
+        h, w = image.shape
+        index = np.arange(w, dtype=np.float64)
+        ret = np.empty(h, dtype=np.float64)
+        buf = np.empty((min(h, chunk), w), dtype=np.float64)
+        for i in xrange(0, h, chunk):
+            rows = buf[:min(chunk, h - i)]
+            rows[...] = image[i:i + len(rows)]
+            np.dot(rows, index, out=ret[i:i + len(rows)])
+        return ret
+
+    def _subpixel_peak(self, image):
+        # Sub-pixel peak of each row from a few pixels around its maximum
+        #   returns row maxima, rows with peak > 0 and their u
+        h, w = image.shape
+        peak = image.argmax(axis=1)
+        s = image[np.arange(h), peak]
+        v = np.where(s > 0)[0]
+        peak = peak[v]
+
+        def pixel(offset):
+            # Intensity at peak + offset, clamped to image border
+            return image[v, np.clip(peak + offset, 0, w - 1)].astype(np.float32)
+
+        if self.refinement_method == 'Blais-Rioux':
+            # Zero crossing of 4th order derivative filter
+            #   g(i) = f(i-2) + f(i-1) - f(i+1) - f(i+2)
+            f = [pixel(i) for i in xrange(-3, 4)]
+            g = [f[i - 2] + f[i - 1] - f[i + 1] - f[i + 2] for i in xrange(2, 5)]
+            # Crossing in [peak, peak + 1] if g(peak) < 0 else in [peak - 1, peak]
+            right = g[1] < 0
+            g0 = np.where(right, g[1], g[0])
+            g1 = np.where(right, g[2], g[1])
+            denom = g0 - g1
+            delta = np.divide(g0, denom, out=np.zeros_like(denom), where=denom != 0) - ~right
+        else:
+            l, c, r = pixel(-1), pixel(0), pixel(1)
+            if self.refinement_method == 'Gaussian':
+                # Parabola through log intensities, zero pixels taken as 1
+                l, c, r = [np.log(np.maximum(x, 1)) for x in (l, c, r)]
+            denom = 2 * (l - 2 * c + r)
+            delta = np.divide(l - r, denom, out=np.zeros_like(denom), where=denom != 0)
+        u = peak + np.clip(delta, -1, 1)
+        return s, v, u
+
     def _threshold_image(self, image):
         if self.threshold_enable:
             if image is not None:
@@ -170,31 +288,40 @@ class LaserSegmentation(object):
     def _window_mask(self, image):
         if self.window_enable:
             if image is not None:
-                peak = image.argmax(axis=1)
-                _min = peak - self.window_value
-                _max = peak + self.window_value + 1
-                mask = np.zeros_like(image)
-                for i in xrange(self.calibration_data.height):
-                    mask[i, _min[i]:_max[i]] = 255
+                peak = image.argmax(axis=1).astype(np.int16)[:, np.newaxis]
+                columns = np.arange(image.shape[1], dtype=np.int16)
+                # peak - window <= column <= peak + window as one unsigned comparison
+                mask = np.subtract(columns, peak - self.window_value,
+                                   dtype=np.int16).view(np.uint16) <= 2 * self.window_value
                 # Apply mask
-                image = cv2.bitwise_and(image, mask)
+                image = np.multiply(image, mask, dtype=np.uint8)
         return image
 
     # Segmented gaussian filter
 
-    def _sgf(self, u, s):
+    def _sgf(self, u, s, sigma=2.0):
         if len(u) > 1:
-            i = 0
-            sigma = 2.0
-            f = np.array([])
-            segments = [s[_r] for _r in np.ma.clump_unmasked(np.ma.masked_equal(s, 0))]
-            # Detect stripe segments
-            for segment in segments:
-                j = len(segment)
-                # Apply gaussian filter
-                fseg = scipy.ndimage.gaussian_filter(u[i:i + j], sigma=sigma)
-                f = np.concatenate((f, fseg))
-                i += j
+            # Detect stripe segments: runs of consecutive rows
+            v = np.where(s > 0)[0]
+            start = np.concatenate(([0], np.where(np.diff(v) != 1)[0] + 1))
+            length = np.diff(np.append(start, len(v)))
+            start = np.repeat(start, length)[:, np.newaxis]
+            length = np.repeat(length, length)[:, np.newaxis]
+
+            # Gaussian kernel (same as scipy.ndimage.gaussian_filter)
+            radius = int(4.0 * sigma + 0.5)
+            offset = np.arange(-radius, radius + 1)
+            weights = np.exp(-0.5 / sigma ** 2 * offset ** 2)
+            weights /= weights.sum()
+
+            # Reflect kernel taps at segment boundaries
+            idx = np.arange(len(u))[:, np.newaxis] + offset - start
+            idx %= 2 * length
+            idx = np.where(idx < length, idx, 2 * length - 1 - idx) + start
+
+            # Apply gaussian filter to all segments
+            f = np.empty(len(u))
+            np.dot(u[idx], weights, out=f)
             return f
         else:
             return u
@@ -204,7 +331,7 @@ class LaserSegmentation(object):
     def _ransac(self, u, v):
         if len(u) > 1:
             data = np.vstack((v.ravel(), u.ravel())).T
-            dr, thetar = self.ransac(data, self.LinearLeastSquares2D(), 2, 1)
+            dr, thetar = self.ransac_batch(data, self.LinearLeastSquares2D(), 2, 1)
             # v = np.array(range(min(v), max(v)))
             u = (dr - v * math.sin(thetar)) / math.cos(thetar)
         return u
@@ -220,7 +347,7 @@ class LaserSegmentation(object):
             data_mean = data.mean(axis=0)
             x0, y0 = data_mean
             if data.shape[0] > 2:  # over determined
-                u, v, w = np.linalg.svd(data - data_mean)
+                u, v, w = np.linalg.svd(data - data_mean, full_matrices=False)
                 vec = w[0]
                 theta = math.atan2(vec[0], vec[1])
             elif data.shape[0] == 2:  # well determined
@@ -234,6 +361,22 @@ class LaserSegmentation(object):
             dfit = data[:, 0] * math.sin(theta) + data[:, 1] * math.cos(theta)
             return np.abs(d - dfit)
 
+        def fit_samples(self, samples):
+            # well determined models for a batch of 2 point samples
+            #   samples - (trials, 2, 2) array
+            theta = np.arctan2(samples[:, 1, 0] - samples[:, 0, 0],
+                               samples[:, 1, 1] - samples[:, 0, 1])
+            theta = (theta + math.pi * 5 / 2) % (2 * math.pi)
+            x0, y0 = samples.mean(axis=1).T
+            d = x0 * np.sin(theta) + y0 * np.cos(theta)
+            return d, theta
+
+        def residuals_samples(self, models, data):
+            # residuals matrix (trials x points) for a batch of models
+            d, theta = models
+            dfit = np.outer(np.sin(theta), data[:, 0]) + np.outer(np.cos(theta), data[:, 1])
+            return np.abs(d[:, np.newaxis] - dfit)
+
         def is_degenerate(self, sample):
             return False
 
@@ -278,3 +421,22 @@ class LaserSegmentation(object):
         if best_inliers is not None:
             best_model = model_class.fit(data[best_inliers])
         return best_model
+
+    def ransac_batch(self, data, model_class, min_samples, threshold, max_trials=100):
+        '''
+        Batched RANSAC: draws all samples at once and scores every
+        hypothesis with one residuals matrix. Same arguments and result as
+        ransac(), model_class has to implement additionally:
+             * fit_samples(samples): return models for (trials, min_samples, D) samples
+             * residuals_samples(models, data): return (trials, N) residuals
+        Degenerate samples are not skipped.
+        '''
+
+        samples = data[np.random.randint(0, data.shape[0], (max_trials, min_samples))]
+        sample_models = model_class.fit_samples(samples)
+        inliers = model_class.residuals_samples(sample_models, data) < threshold
+        inlier_num = inliers.sum(axis=1)
+        best = inlier_num.argmax()
+        if inlier_num[best] > 0:
+            return model_class.fit(data[inliers[best]])
+        return None
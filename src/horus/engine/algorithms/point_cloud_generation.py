@@ -18,6 +18,9 @@ class PointCloudGeneration(object):
 
     def __init__(self):
         self.calibration_data = CalibrationData()
+        self._motor_step = 0
+        self._transforms = None
+        self._transforms_key = None
 
     def compute_point_cloud(self, theta, points_2d, index, d = None, n = None, M = None):
         # compute point cloud in model coords
@@ -26,13 +29,13 @@ class PointCloudGeneration(object):
         #   d,n - projection plane
         #   M - cloud correction matrix
 
-        # Compute in turntable coords
-        Xwo = self.compute_platform_point_cloud(points_2d, index, d, n)
+        # Compute in camera coords
+        Xc = self._compute_laser_point_cloud(points_2d, index, d, n)
 
-        # Rotate to model coordinates
-        c, s = np.cos(-theta), np.sin(-theta)
-        Rz = np.matrix([[c, -s, 0], [s, c, 0], [0, 0, 1]])
-        Xw = Rz * Xwo
+        # Transform to model coordinates
+        T = self.get_transform(theta)
+        Xw = np.dot(T[:, :3], Xc)
+        Xw += T[:, 3:]
         '''
         # Correction
         if M is None and index is not None:
@@ -44,15 +47,48 @@ class PointCloudGeneration(object):
         '''
         # Return point cloud
         if Xw.size > 0:
-            return np.array(Xw)
+            return Xw
         else:
             return None
 
+    def project_point_cloud(self, point_cloud, theta):
+        # image coords of model points seen at platform position
+        #   point_cloud - (3, N) model coords
+        #   theta - rad, platform position
+        #   returns u, v arrays
+        T = np.float64(self.get_transform(theta))
+        R = T[:, :3]
+        # Model to camera: Xc = R.T * (Xw - t)
+        rvec = cv2.Rodrigues(R.T)[0]
+        tvec = -np.dot(R.T, T[:, 3])
+        points = np.ascontiguousarray(point_cloud.T, dtype=np.float64).reshape(-1, 1, 3)
+        p = cv2.projectPoints(points, rvec, tvec, self.calibration_data.camera_matrix,
+                              self.calibration_data.distortion_vector)[0]
+        return p[:, 0, 0], p[:, 0, 1]
+
     def compute_platform_point_cloud(self, points_2d, index, d = None, n = None):
         # compute point cloud in platform coords
         #   points_2d = [u,v]
         #   R, t has to be np.matrix
 
+        # Load calibration values
+        R = np.matrix(self.calibration_data.platform_rotation)
+        t = np.matrix(self.calibration_data.platform_translation).T
+
+        # Camera system
+        Xc = self._compute_laser_point_cloud(points_2d, index, d, n)
+        # Compute platform transformation
+        return R.T * Xc - R.T * t
+
+    def _compute_laser_point_cloud(self, points_2d, index, d=None, n=None):
+        # compute point cloud in camera coords for laser plane
+
+        # Calibrated laser plane: use precomputed lookup table
+        if n is None and d is None and index is not None:
+            Xc = self.compute_camera_point_cloud_lut(points_2d, index)
+            if Xc is not None:
+                return Xc
+
         # Load laser plane position
         if n is None and index is not None:
             n = self.calibration_data.laser_planes[index].normal
@@ -62,15 +98,86 @@ class PointCloudGeneration(object):
             d = self.calibration_data.laser_planes[index].distance
         assert n is not None, "Plane distance not defined"
 
-        # Load calibration values
-        R = np.matrix(self.calibration_data.platform_rotation)
-        t = np.matrix(self.calibration_data.platform_translation).T
+        return self.compute_camera_point_cloud(points_2d, d, n)
 
-        # Camera system
-        Xc = self.compute_camera_point_cloud(points_2d, d, n)
-        # Compute platform transformation
-        return R.T * Xc - R.T * t
+    # Camera to model transformations
+
+    def set_motor_step(self, value):
+        self._motor_step = value
+
+    def get_transform(self, theta):
+        # fused 3x4 camera to model transformation for platform position
+        #   theta - rad, platform position
+        transforms = self._compute_transforms()
+        if transforms is not None:
+            k = int(round(theta / np.deg2rad(self._motor_step)))
+            if 0 <= k < len(transforms) and \
+               abs(np.deg2rad(k * self._motor_step) - theta) < 1e-6:
+                return transforms[k]
+        return self._compute_transform(np.array([theta]))[0]
+
+    def _compute_transforms(self):
+        # Precompute transformations for every scan step
+        #   keyed on motor step and platform extrinsics
+        if not self._motor_step or \
+           self.calibration_data.platform_rotation is None or \
+           self.calibration_data.platform_translation is None:
+            return None
+
+        key = (self._motor_step,
+               np.float64(self.calibration_data.platform_rotation).tostring(),
+               np.float64(self.calibration_data.platform_translation).tostring())
+        if self._transforms_key != key:
+            steps = int(np.ceil(360.0 / abs(self._motor_step))) + 1
+            theta = np.deg2rad(np.arange(steps) * self._motor_step)
+            self._transforms = self._compute_transform(theta)
+            self._transforms_key = key
+        return self._transforms
+
+    def _compute_transform(self, theta):
+        # Xw = Rz(-theta) * (R.T * Xc - R.T * t)
+        R = np.float64(self.calibration_data.platform_rotation)
+        t = np.float64(self.calibration_data.platform_translation).reshape(3)
 
+        c, s = np.cos(-theta), np.sin(-theta)
+        Rz = np.zeros((len(theta), 3, 3))
+        Rz[:, 0, 0] = c
+        Rz[:, 0, 1] = -s
+        Rz[:, 1, 0] = s
+        Rz[:, 1, 1] = c
+        Rz[:, 2, 2] = 1
+
+        T = np.empty((len(theta), 3, 4))
+        T[:, :, :3] = np.einsum('kij,jl->kil', Rz, R.T)
+        T[:, :, 3] = -np.dot(T[:, :, :3], t)
+        return np.float32(T)
+
+    def compute_camera_point_cloud_lut(self, points_2d, index):
+        # compute point cloud in camera coords using laser plane lookup table
+        #   points_2d = [u,v], u - subpixel column, v - integer row
+        #   returns None if lookup table is not available
+
+        lut = self.calibration_data.laser_lut(index)
+        if lut is None:
+            return None
+
+        u, v = points_2d
+        if len(u) == 0:
+            return np.empty((3, 0), dtype=np.float32)
+
+        u = np.float32(u)
+        v = np.asarray(v).astype(np.intp)
+
+        # Linear interpolation between neighbour columns
+        u0 = u.astype(np.intp)
+        np.clip(u0, 0, lut.shape[1] - 2, out=u0)
+        f = (u - u0)[:, np.newaxis]
+        a = lut[v, u0]
+        b = lut[v, u0 + 1]
+        b -= a
+        b *= f
+        b += a
+        return b.T  # [X,Y,Z]
 
     def compute_camera_point_cloud_horus(self, points_2d, d, n):
         # Load calibration values
@@ -84,7 +191,6 @@ class PointCloudGeneration(object):
         # Compute laser intersection
         return d / np.dot(n, x) * x
 
-
     def compute_camera_point_cloud(self, points_2d, d, n):
         # compute point cloud in world coords
         #   points_2d = [u,v]
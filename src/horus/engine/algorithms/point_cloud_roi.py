@@ -22,6 +22,10 @@ class PointCloudROI(object):
         self._show_center = True
         self._height = 0
         self._radious = 0
+        self._laser_bounds = [None] * len(self.calibration_data.laser_planes)
+        self._laser_bounds_key = [None] * len(self.calibration_data.laser_planes)
+        self._exclusive_bounds = [None] * len(self.calibration_data.laser_planes)
+        self._exclusive_bounds_key = [None] * len(self.calibration_data.laser_planes)
         self._initialize()
 
     def _initialize(self):
@@ -76,6 +80,151 @@ class PointCloudROI(object):
 
         return image
 
+    def crop_image(self, image, index=None, exclusive=False):
+        # zero copy view of ROI area and its (u, v) offset in image
+        #   index - laser index to crop to ROI area seen on laser plane
+        if self._center_v != 0 and self._center_u != 0 and self._use_roi:
+            if image is not None:
+                bounds = self.get_laser_bounds(index, exclusive)
+                if bounds is not None:
+                    umin, umax, vmin, vmax = bounds[2]
+                else:
+                    umin, umax, vmin, vmax = self._umin, self._umax, self._vmin, self._vmax
+                return image[vmin:vmax, umin:umax], (umin, vmin)
+
+        return image, (0, 0)
+
+    def mask_laser_image(self, image, offset, index, exclusive=False):
+        # zero laser image pixels outside ROI row bounds of laser plane
+        #   image - single channel (cropped) laser image
+        #   offset - (u, v) offset of image in full frame
+        bounds = self.get_laser_bounds(index, exclusive)
+        if bounds is not None and image is not None:
+            du, dv = offset
+            h, w = image.shape[:2]
+            image = cv2.bitwise_and(image, bounds[3][dv:dv + h, du:du + w])
+        return image
+
+    def mask_points_2d(self, points_2d, index, exclusive=False):
+        # remove points outside ROI row bounds of laser plane
+        bounds = self.get_laser_bounds(index, exclusive)
+        if bounds is not None:
+            u, v = points_2d
+            if len(u) > 0:
+                mask = bounds[3]
+                _u = np.clip(np.rint(u), 0, mask.shape[1] - 1).astype(int)
+                idx = np.where(mask[v, _u] > 0)[0]
+                return u[idx], v[idx]
+        return points_2d
+
+    def get_laser_bounds(self, index, exclusive=False):
+        # ROI cylinder area seen on laser plane
+        #   exclusive - keep only pixels where the camera facing half of this
+        #               laser plane is seen and no other laser plane is
+        #   returns (u_min, u_max, rect, mask) or None
+        #     u_min, u_max - per row bounds (inclusive), u_min > u_max for empty rows
+        #     rect - (umin, umax, vmin, vmax) bounding rectangle
+        #     mask - full frame uint8 mask of row bounds
+        if index is None or \
+           not (self._center_v != 0 and self._center_u != 0 and self._use_roi):
+            return None
+        self._compute_laser_bounds(index)
+        if exclusive:
+            self._compute_exclusive_bounds(index)
+            return self._exclusive_bounds[index]
+        return self._laser_bounds[index]
+
+    def _compute_exclusive_bounds(self, index):
+        # Laser bounds split between lasers by the projected turntable axis
+        #   all laser planes pass through the axis, the camera sees the line
+        #   of each laser on the plane half in front of the axis, and these
+        #   halves are seen at opposite sides of the axis in the image
+        for i in xrange(len(self._laser_bounds)):
+            self._compute_laser_bounds(i)
+        key = tuple(self._laser_bounds)
+        old_key = self._exclusive_bounds_key[index]
+        if old_key is not None and all(a is b for a, b in zip(old_key, key)):
+            return
+
+        bounds = self._laser_bounds[index]
+        if bounds is None:
+            self._exclusive_bounds[index] = None
+        else:
+            mask = cv2.bitwise_and(bounds[3], self._front_mask(index))
+            for i, other in enumerate(self._laser_bounds):
+                if i != index and other is not None:
+                    other = cv2.bitwise_and(other[3], self._front_mask(i))
+                    cv2.bitwise_and(mask, cv2.bitwise_not(other), mask)
+
+            # Row bounds of remaining area
+            inside = mask > 0
+            height, width = inside.shape
+            rows = inside.any(axis=1)
+            u_min = np.argmax(inside, axis=1).astype(np.int32)
+            u_max = (width - 1 - np.argmax(inside[:, ::-1], axis=1)).astype(np.int32)
+            u_min[~rows] = 0
+            u_max[~rows] = -1
+            v = np.where(rows)[0]
+            if len(v) > 0:
+                rect = (int(u_min[v].min()), int(u_max[v].max()) + 1, int(v[0]), int(v[-1]) + 1)
+            else:
+                rect = (0, 0, 0, 0)
+            self._exclusive_bounds[index] = (u_min, u_max, rect, mask)
+        self._exclusive_bounds_key[index] = key
+
+    def _front_mask(self, index):
+        # Pixels whose laser plane point lies in front of the turntable axis
+        lut = self.calibration_data.laser_lut(index)
+        R = np.float32(self.calibration_data.platform_rotation)
+        t = np.float32(self.calibration_data.platform_translation).reshape(3)
+        # Laser plane pixels and camera center in platform coords
+        p = np.dot(lut - t, R)
+        c = np.dot(-t, R)
+        with np.errstate(invalid='ignore'):
+            front = p[:, :, 0] * c[0] + p[:, :, 1] * c[1] > 0
+        return front.astype(np.uint8) * 255
+
+    def _compute_laser_bounds(self, index):
+        lut = self.calibration_data.laser_lut(index)
+        if lut is None:
+            self._laser_bounds[index] = None
+            self._laser_bounds_key[index] = None
+            return
+
+        R = np.float32(self.calibration_data.platform_rotation)
+        t = np.float32(self.calibration_data.platform_translation).reshape(3)
+        key = (lut, R.tostring(), t.tostring(), self._radious, self._height)
+        old_key = self._laser_bounds_key[index]
+        if old_key is not None and old_key[0] is lut and old_key[1:] == key[1:]:
+            return
+
+        # Laser plane pixels in platform coords
+        p = np.dot(lut - t, R)
+        with np.errstate(invalid='ignore'):
+            inside = (np.square(p[:, :, 0]) + np.square(p[:, :, 1]) <= self._radious ** 2) & \
+                     (p[:, :, 2] >= 0) & (p[:, :, 2] <= self._height) & (lut[:, :, 2] > 0)
+
+        # Row bounds
+        height, width = inside.shape
+        rows = inside.any(axis=1)
+        u_min = np.argmax(inside, axis=1).astype(np.int32)
+        u_max = (width - 1 - np.argmax(inside[:, ::-1], axis=1)).astype(np.int32)
+        u_min[~rows] = 0
+        u_max[~rows] = -1
+
+        columns = np.arange(width, dtype=np.int32)
+        mask = (columns >= u_min[:, np.newaxis]) & (columns <= u_max[:, np.newaxis])
+        mask = mask.astype(np.uint8) * 255
+
+        v = np.where(rows)[0]
+        if len(v) > 0:
+            rect = (int(u_min[v].min()), int(u_max[v].max()) + 1, int(v[0]), int(v[-1]) + 1)
+        else:
+            rect = (0, 0, 0, 0)
+
+        self._laser_bounds[index] = (u_min, u_max, rect, mask)
+        self._laser_bounds_key[index] = key
+
     def mask_point_cloud(self, point_cloud, texture):
         if point_cloud is not None and texture is not None and len(point_cloud) > 0:
             rho = np.sqrt(np.square(point_cloud[0, :]) + np.square(point_cloud[1, :]))
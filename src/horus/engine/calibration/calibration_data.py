@@ -58,6 +58,12 @@ class CalibrationData(object):
         self._md5_hash = None
 
         self.laser_planes = [LaserPlane('left'), LaserPlane('right')]
+
+        # Pixel to 3D lookup tables
+        self._ray_table = None
+        self._ray_table_key = None
+        self._laser_lut = [None] * len(self.laser_planes)
+        self._laser_lut_key = [None] * len(self.laser_planes)
         self.platform_rotation = None
         self.platform_translation = None
 
@@ -96,7 +102,8 @@ class CalibrationData(object):
         if self.width != width or self.height != height:
             self.width = width
             self.height = height
-            self._compute_weight_matrix()
+            # computed on demand
+            self._weight_matrix = None
 
     @property
     def camera_matrix(self):
@@ -126,6 +133,8 @@ class CalibrationData(object):
 
     @property
     def weight_matrix(self):
+        if self._weight_matrix is None:
+            self._compute_weight_matrix()
         return self._weight_matrix
 
     def _compute_dist_camera_matrix(self):
@@ -142,6 +151,38 @@ class CalibrationData(object):
         self._weight_matrix = np.array((np.matrix(np.linspace(0, self.width - 1, self.width)).T *
                                         np.matrix(np.ones(self.height))).T)
 
+    def _compute_ray_table(self):
+        # Undistorted camera rays [x, y, 1] for every image pixel
+        key = (self._md5_hash, self.width, self.height)
+        if self._ray_table_key != key:
+            u, v = np.meshgrid(np.arange(self.width, dtype=np.float32),
+                               np.arange(self.height, dtype=np.float32))
+            pts = np.dstack((u, v)).reshape(-1, 1, 2)
+            x = cv2.undistortPoints(pts, self._camera_matrix, self._distortion_vector)
+            ray_table = np.ones((self.height, self.width, 3), dtype=np.float32)
+            ray_table[:, :, :2] = x.reshape(self.height, self.width, 2)
+            self._ray_table = ray_table
+            self._ray_table_key = key
+        return self._ray_table
+
+    def laser_lut(self, index):
+        # Camera space XYZ of every image pixel projected on the laser plane
+        #   returns (height, width, 3) float32 table or None if not calibrated
+        plane = self.laser_planes[index]
+        if not self.check_camera_calibration() or plane.is_empty() or \
+           self.width <= 1 or self.height <= 0:
+            return None
+
+        normal = np.float32(plane.normal)
+        distance = np.float32(plane.distance)
+        key = (self._md5_hash, self.width, self.height, float(distance), tuple(normal))
+        if self._laser_lut_key[index] != key:
+            ray = self._compute_ray_table()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._laser_lut[index] = ray * (distance / ray.dot(normal))[:, :, np.newaxis]
+            self._laser_lut_key[index] = key
+        return self._laser_lut[index]
+
     def check_camera_calibration(self):
         if self.camera_matrix is None or self.distortion_vector is None:
             return False
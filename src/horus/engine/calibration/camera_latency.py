@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# This file is part of the Horus Project
+
+__author__ = 'Jesús Arroyo Torrens <jesus.arroyo@bq.com>'
+__copyright__ = 'Copyright (C) 2014-2016 Mundo Reader S.L.'
+__license__ = 'GNU General Public License v2 http://www.gnu.org/licenses/gpl2.html'
+
+import cv2
+import numpy as np
+
+from horus import Singleton
+from horus.engine.driver.driver import Driver
+from horus.engine.calibration.calibration import Calibration, CalibrationCancel
+from horus.engine.calibration.autocheck import LaserNotDetected
+
+from horus.util import profile
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def flush_profile_key(width=None, height=None, frame_rate=None):
+    # Flush profiles are stored per resolution and frame rate in use by
+    # the camera, profile settings may be auto (-1)
+    camera = Driver().camera
+    if width is None or height is None:
+        width, height = camera.get_resolution()
+    if frame_rate is None:
+        frame_rate = camera.get_frame_rate()
+    return '{0}x{1}@{2}'.format(width, height, frame_rate)
+
+
+def get_flush_profile(key=None):
+    # [ texture, laser, pattern, change mode ] or None if not profiled
+    if key is None:
+        key = flush_profile_key()
+    return profile.settings['flush_profiles'].get(key)
+
+
+@Singleton
+class CameraLatency(Calibration):
+
+    """Camera latency profiler:
+            - Toggle laser and count frames until image is stable
+            - Switch camera settings and count frames until image is stable
+            - Store minimal safe flush values for current resolution and frame rate
+    """
+
+    def __init__(self):
+        self.image = None
+        self.frames = 8  # frames read after each change
+        self.trials = 3
+        self.threshold = 30  # pixel difference
+        self.min_pixels = 50  # changed pixels to detect laser
+        Calibration.__init__(self)
+
+    def _start(self):
+        if self.driver.is_connected:
+            ret = False
+            response = None
+            self._is_calibrating = True
+            self.image_capture.stream = False
+            # Read raw device frames
+            grabbing = self.driver.camera.is_grabbing
+            self.driver.camera.stop_grabber()
+            self.driver.board.lasers_off()
+
+            try:
+                response = self.profile_latency()
+                ret = True
+            except Exception as exception:
+                response = exception
+            finally:
+                self._is_calibrating = False
+                self.driver.board.lasers_off()
+                if grabbing:
+                    self.driver.camera.start_grabber()
+                self.image_capture.stream = True
+                if self._progress_callback is not None:
+                    self._progress_callback(100)
+                if self._after_callback is not None:
+                    self._after_callback((ret, response))
+                self.image = None
+
+    def profile_latency(self):
+        board = self.driver.board
+        image_capture = self.image_capture
+
+        image_capture.set_mode_laser()
+        laser_on, laser_off = 0, 0
+        for i in xrange(self.trials):
+            # Laser switch on and off
+            laser_on = max(laser_on, self._measure(lambda: board.laser_on(0), True))
+            laser_off = max(laser_off, self._measure(lambda: board.laser_off(0), True))
+            self._progress(i + 1, 2 * self.trials)
+
+        change_mode = 0
+        for i in xrange(self.trials):
+            # Camera settings switch
+            change_mode = max(change_mode, self._measure(
+                image_capture.texture_mode.send_all_settings))
+            change_mode = max(change_mode, self._measure(
+                image_capture.laser_mode.send_all_settings))
+            self._progress(self.trials + i + 1, 2 * self.trials)
+        # Restore capture mode settings
+        image_capture.set_mode_texture()
+
+        # Texture and pattern are captured after lasers go off
+        flush = [laser_off, laser_on, laser_off, change_mode]
+        key = flush_profile_key()
+        flush_profiles = dict(profile.settings['flush_profiles'])
+        flush_profiles[key] = flush
+        profile.settings['flush_profiles'] = flush_profiles
+        image_capture.set_flush_values(*flush)
+        logger.info("Camera flush profile {0}: {1}".format(key, flush))
+        return key, flush
+
+    def _measure(self, change, required=False):
+        # Frames to flush after change before first stable frame
+        camera = self.driver.camera
+        before = camera.capture_image(flush=self.frames, rgb=False)
+        change()
+        frames = [camera.capture_image(rgb=False) for i in xrange(self.frames)]
+        if not self._is_calibrating:
+            raise CalibrationCancel()
+        if before is None or any(frame is None for frame in frames):
+            raise LaserNotDetected()
+        self.image = frames[-1]
+
+        # Pixels changed against final image
+        changed = [np.count_nonzero(cv2.absdiff(frame, frames[-1]) > self.threshold)
+                   for frame in [before] + frames]
+        if changed[0] < self.min_pixels:
+            if required:
+                raise LaserNotDetected()
+            # No visible change
+            return 0
+        # First frame that reached final state
+        for i in xrange(1, len(changed)):
+            if changed[i] <= changed[0] * 0.1:
+                return i - 1
+        return len(frames) - 1
+
+    def _progress(self, value, total):
+        if self._progress_callback is not None:
+            self._progress_callback(100 * value / total)
@@ -60,6 +60,7 @@ class Board(object):
         self.unplug_callback = None
 
         self._serial_port = None
+        self._serial_lock = threading.RLock()
         self._is_connected = False
         self._laser_number = 2
         self._light = [0,0]
@@ -130,6 +131,10 @@ class Board(object):
                 logger.error("Error closing the port {0}\n".format(self.serial_name))
             logger.info(" Done")
 
+    @property
+    def is_connected(self):
+        return self._is_connected
+
     def set_unplug_callback(self, value):
         self.unplug_callback = value
 
@@ -219,24 +224,26 @@ class Board(object):
         """Sends the request and returns the response"""
         ret = ''
         if self._is_connected and req != '':
-            if self._serial_port is not None and self._serial_port.isOpen():
-                try:
-                    self._serial_port.flushInput()
-                    self._serial_port.flushOutput()
-                    #print("Cmd: "+req)
-                    self._serial_port.write(req + "\r\n")
-                    while req != '~' and req != '!' and ret == '':
-                        ret = self.read(read_lines)
-                        #print(ret)
-                        time.sleep(0.01)
-                    if ret.lower().rstrip("\r\n") != 'ok':
-                        logger.warn("[ WARN board command ] '{0}' => '{1}'".format(req, ret.rstrip("\r\n")))
-                    self._success()
-                except:
-                    if hasattr(self, '_serial_port'):
-                        if callback is not None:
-                            callback(ret)
-                        self._fail()
+            # Serialize request/response pairs from concurrent (nonblocking) senders
+            with self._serial_lock:
+                if self._serial_port is not None and self._serial_port.isOpen():
+                    try:
+                        self._serial_port.flushInput()
+                        self._serial_port.flushOutput()
+                        #print("Cmd: "+req)
+                        self._serial_port.write(req + "\r\n")
+                        while req != '~' and req != '!' and ret == '':
+                            ret = self.read(read_lines)
+                            #print(ret)
+                            time.sleep(0.01)
+                        if ret.lower().rstrip("\r\n") != 'ok':
+                            logger.warn("[ WARN board command ] '{0}' => '{1}'".format(req, ret.rstrip("\r\n")))
+                        self._success()
+                    except:
+                        if hasattr(self, '_serial_port'):
+                            if callback is not None:
+                                callback(ret)
+                            self._fail()
         if callback is not None:
             callback(ret)
         #print("Cmd DONE: "+ret)
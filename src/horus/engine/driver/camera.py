@@ -6,6 +6,7 @@ __copyright__ = 'Copyright (C) 2014-2016 Mundo Reader S.L.'
 __license__ = 'GNU General Public License v2 http://www.gnu.org/licenses/gpl2.html'
 
 from horus.util import profile
+from horus.engine.driver.frame_pool import FramePool
 
 import cv2
 import logging
@@ -49,6 +50,8 @@ class Camera(object):
         self.parent = parent
         self.camera_id = camera_id
         self.unplug_callback = None
+        self.frame_pool = FramePool()
+        self._grabbing = False  # background frame grabber running
 
         self.initialize()
 
@@ -87,11 +90,16 @@ class Camera(object):
     def set_unplug_callback(self, value):
         self.unplug_callback = value
 
-    def capture_image(self, flush=0):
+    @property
+    def is_grabbing(self):
+        return self._grabbing
+
+    def capture_image(self, flush=0, rgb=True):
         # flush buffered frames
         # 0 - no flush
         # -1 - auto flush
         # n - flush exactly n frames
+        # rgb - convert to RGB, else native BGR frame
         raise NotImplementedError
 
     def save_image(self, filename, image):
@@ -148,6 +156,9 @@ class Camera(object):
     def get_exposure(self):
         return self._exposure
 
+    def get_frame_rate(self):
+        return self._frame_rate
+
     def get_resolution(self):
         if self._rotate:
             return int(self._height), int(self._width)
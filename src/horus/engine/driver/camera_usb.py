@@ -9,9 +9,12 @@ from horus.util import profile
 
 import cv2
 import math
+import numpy as np
 import time
 import glob
 import platform
+import threading
+import collections
 import wx
 
 from horus.engine.driver.camera import Camera, WrongCamera, CameraNotConnected, InvalidVideo, \
@@ -28,6 +31,19 @@ if system == 'Darwin':
     import uvc
     from uvc.mac import *
 
+# Camera orientation (rotate, hflip, vflip) as a single operation
+#   rotate is a transpose followed by the flips
+ORIENTATIONS = {
+    (False, False, False): None,
+    (False, True, False): lambda image, dst: cv2.flip(image, 1, dst),
+    (False, False, True): lambda image, dst: cv2.flip(image, 0, dst),
+    (False, True, True): lambda image, dst: cv2.flip(image, -1, dst),
+    (True, False, False): cv2.transpose,
+    (True, True, False): lambda image, dst: cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE, dst),
+    (True, False, True): lambda image, dst: cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE, dst),
+    (True, True, True): lambda image, dst: cv2.flip(cv2.transpose(image, dst), -1, dst),
+}
+
 
 class Camera_usb(Camera):
 
@@ -42,11 +58,18 @@ class Camera_usb(Camera):
         self._reading = False
         self._updating = False
         self._last_image = None
+        self._frame_shape = None  # device frame shape for pool buffers
         self._video_list = None
         self._tries = 0  # Check if command fails
 
         self._auto_resolution = False
 
+        # Background frame grabber: ring of (timestamp, raw frame)
+        self._grabber = None
+        self._grabbing = False
+        self._frames = collections.deque(maxlen=4)
+        self._frames_condition = threading.Condition()
+
         self.initialize()
 
         self._max_exposure = 1. # fallback value
@@ -189,6 +212,9 @@ class Camera_usb(Camera):
             self.DetectLimits()
             self._check_camera()
 
+            if profile.settings['camera_frame_grabber']:
+                self.start_grabber()
+
             #logger.info("  check win driver bug")
             #self._check_driver()
 
@@ -200,6 +226,7 @@ class Camera_usb(Camera):
         tries = 0
         if self._is_connected:
             logger.info("Disconnecting camera {0}".format(self.camera_id))
+            self.stop_grabber()
             if self._capture is not None:
                 if self._capture.isOpened():
                     self._is_connected = False
@@ -253,16 +280,30 @@ class Camera_usb(Camera):
             if mean > 200:
                 raise WrongDriver()
 
-    def capture_image(self, flush=0):
+    def capture_image(self, flush=0, rgb=True):
         """Capture image from camera"""
         # flush buffered frames
         # 0 - no flush
         # -1 - auto flush
         # n - flush exactly n frames
+        # With frame grabber running any flush means
+        # first frame exposed after this call
+        # rgb - convert to RGB, else native BGR frame
         if self._is_connected:
             #tbegin = time.time()
             if self._updating:
-                return self._last_image
+                if self._last_image is None:
+                    return None
+                # Callers modify frames in place, last frame is not shared
+                image = self.frame_pool.get(self._last_image.shape)
+                np.copyto(image, self._last_image)
+                return image
+            elif self._grabbing:
+                if flush != 0:
+                    image = self._grab_frame(time.time())
+                else:
+                    image = self._grab_frame()
+                ret = image is not None
             else:
                 self._reading = True
                 # Note: Windows needs read() to perform
@@ -275,14 +316,14 @@ class Camera_usb(Camera):
                     while b - e > (flush * 0.001) and c < 4:
                         b = time.time()
                         #self._capture.grab()
-                        ret, image = self._capture.read()
+                        ret, image = self._read_frame()
                         e = time.time()
                         c += 1
                         #print "     frame {1}: {0} ms".format(int((e - b) * 1000), c)
                 else:
                     for i in xrange(flush+1):
                         #b = time.time()
-                        ret, image = self._capture.read()
+                        ret, image = self._read_frame()
                         #e = time.time()
                         #print "     frame: {0} ms".format(int((e - b) * 1000))
 
@@ -290,24 +331,95 @@ class Camera_usb(Camera):
                 #tbegin = time.time()
 
                 self._reading = False
-                if ret:
+            if ret:
+                orientation = ORIENTATIONS[(bool(self._rotate), bool(self._hflip), bool(self._vflip))]
+                if orientation is not None:
+                    shape = image.shape
                     if self._rotate:
-                        image = cv2.transpose(image)
-                    if self._hflip:
-                        image = cv2.flip(image, 1)
-                    if self._vflip:
-                        image = cv2.flip(image, 0)
-                    self._success()
-                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                        shape = (shape[1], shape[0]) + shape[2:]
+                    image = orientation(image, self.frame_pool.get(shape))
+                elif self._grabbing:
+                    # Do not modify frame shared with grabber ring
+                    dst = self.frame_pool.get(image.shape)
+                    np.copyto(dst, image)
+                    image = dst
+                self._success()
+                if rgb:
+                    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, image)
                     self._last_image = image
-                    #print "   driver capture process: {0} ms".format(int((time.time() - tbegin) * 1000))
-                    return image
-                else:
-                    self._fail()
-                    return None
+                #print "   driver capture process: {0} ms".format(int((time.time() - tbegin) * 1000))
+                return image
+            else:
+                self._fail()
+                return None
         else:
             return None
 
+    # ------------- Frame grabber ----------
+    def start_grabber(self):
+        if self._is_connected and not self._grabbing:
+            self._frames.clear()
+            self._grabbing = True
+            self._grabber = threading.Thread(target=self._grab_loop)
+            self._grabber.daemon = True
+            self._grabber.start()
+
+    def stop_grabber(self):
+        if self._grabbing:
+            self._grabbing = False
+            with self._frames_condition:
+                self._frames_condition.notify_all()
+            if self._grabber is not threading.current_thread():
+                self._grabber.join(2)
+            self._grabber = None
+
+    def _grab_loop(self):
+        # Keep reading device, frames are stamped when read completes
+        while self._grabbing and self._is_connected:
+            if self._updating:
+                time.sleep(0.005)
+                continue
+            self._reading = True
+            ret, image = self._read_frame()
+            self._reading = False
+            if ret:
+                with self._frames_condition:
+                    self._frames.append((time.time(), image))
+                    self._frames_condition.notify_all()
+            else:
+                time.sleep(0.01)
+        self._grabbing = False
+
+    def _read_frame(self):
+        # Read device frame into pool buffer
+        buf = None
+        if self._frame_shape is not None:
+            buf = self.frame_pool.get(self._frame_shape)
+        ret, image = self._capture.read(buf)
+        if ret:
+            self._frame_shape = image.shape
+        return ret, image
+
+    def _grab_frame(self, after=None, timeout=1.0):
+        # Newest raw frame, or first frame exposed after given time
+        #   exposure start taken as read time minus one frame period
+        period = 1. / self._frame_rate if self._frame_rate > 0 else 0
+        deadline = time.time() + timeout
+        with self._frames_condition:
+            while self._grabbing:
+                if after is None:
+                    if self._frames:
+                        return self._frames[-1][1]
+                else:
+                    for timestamp, image in self._frames:
+                        if timestamp - period >= after:
+                            return image
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._frames_condition.wait(remaining)
+        return None
+
     # ------------- Probe limits ----------
     def DetectPropMax(self, min, max, prop_id):
         if prop_id is None:
@@ -392,7 +504,7 @@ class Camera_usb(Camera):
                     ret = self._capture.set(self.CV_CAP_PROP_SATURATION, value)
                     if system == 'Windows' and not ret:
                         print "ERROR Set Exposure {0}".format(value)
-                    self._updating = False
+                self._updating = False
                 return True
         return False
 
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# This file is part of the Horus Project
+
+__author__ = 'Jesús Arroyo Torrens <jesus.arroyo@bq.com>'
+__copyright__ = 'Copyright (C) 2014-2016 Mundo Reader S.L.'
+__license__ = 'GNU General Public License v2 http://www.gnu.org/licenses/gpl2.html'
+
+import sys
+import threading
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+# References held while pool checks a buffer: list item, local variable
+# and getrefcount argument
+_POOL_REFS = 3
+
+
+class FramePool(object):
+
+    """Fixed size pool of reusable frame buffers
+
+        A buffer goes back to the pool as soon as the pool holds the only
+        reference to it, so frames shared between captures, background
+        reuse and current video are never overwritten while in use.
+        Scan captures drop their frames with ScanCapture.release().
+        Any other holder, including views of a buffer, only keeps it out
+        of reuse. Buffers are filled with the dst argument of cv2 calls.
+    """
+
+    def __init__(self, size=16):
+        self.size = size
+        self.allocated = 0  # buffers allocated outside of pool
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    def set_size(self, value):
+        with self._lock:
+            self.size = max(0, int(value))
+            del self._buffers[self.size:]
+
+    def get(self, shape, dtype=np.uint8):
+        # Free buffer with given shape, new one if none is free
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self._lock:
+            evict = None
+            for i in xrange(len(self._buffers)):
+                buf = self._buffers[i]
+                if sys.getrefcount(buf) <= _POOL_REFS:
+                    if buf.shape == shape and buf.dtype == dtype:
+                        return buf
+                    evict = i
+            buf = np.empty(shape, dtype)
+            if len(self._buffers) < self.size:
+                self._buffers.append(buf)
+            elif evict is not None:
+                # Replace free buffer of other shape
+                self._buffers[evict] = buf
+            else:
+                # Pool exhausted, buffer is not reused
+                self.allocated += 1
+            return buf
+
+    def clear(self):
+        with self._lock:
+            del self._buffers[:]
+            self.allocated = 0
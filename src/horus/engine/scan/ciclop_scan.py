@@ -12,6 +12,8 @@ import datetime
 import struct
 import os
 import threading
+import collections
+from multiprocessing.pool import ThreadPool
 
 from horus import Singleton
 from horus.engine.scan.scan import Scan, ScanError
@@ -35,6 +37,7 @@ class CiclopScan(Scan):
 
         - Capture Thread: capture raw images and manage motor and lasers
         - Process Thread: compute 3D point cloud from raw images
+          optionally spread over a pool of worker threads
     """
 
     def __init__(self):
@@ -43,7 +46,11 @@ class CiclopScan(Scan):
         self.current_video = CurrentVideo()
         self.calibration_data = CalibrationData()
         self.texture_mode = 2 # Capture 
+        self.texture_steps = 1
         self.laser = [True]*len(self.calibration_data.laser_planes)
+        self.single_exposure = False
+        self.background_reuse = ('Never', 1, 0)
+        self._exclusive = False
         self.move_motor = True
         self.motor_step = 0
         self.motor_speed = 0
@@ -56,6 +63,14 @@ class CiclopScan(Scan):
         self._debug = False
         self._scan_sleep = 0.05
         self._captures_queue = Queue.Queue(10)
+        self.compact_capture = False
+        self.queue_memory = 150  # MB
+        self._process_workers = 1
+        self._pipelined_capture = False
+        self._step_time = 0
+        self._move_timeout = 2.0  # s, board reply margin in pipelined capture
+        self._column_buffers = collections.deque()
+        self._color_views = {}
         self.point_cloud_callback = None
 
         self.ph_save_enable = False
@@ -67,6 +82,7 @@ class CiclopScan(Scan):
 
     def read_profile(self):
         self.set_texture_mode(profile.settings['texture_mode'])
+        self.set_texture_steps(profile.settings['texture_capture_steps'])
 
         self.set_color(profile.settings['point_cloud_color'])
         self.set_colors(0, profile.settings['point_cloud_color_l'])
@@ -75,6 +91,10 @@ class CiclopScan(Scan):
         use_laser = profile.settings['use_laser']
         self.set_use_left_laser(use_laser == 'Left' or use_laser == 'Both')
         self.set_use_right_laser(use_laser == 'Right' or use_laser == 'Both')
+        self.set_single_exposure(profile.settings['single_exposure_lasers'])
+        self.set_background_reuse(profile.settings['background_reuse'],
+                                  profile.settings['background_reuse_steps'],
+                                  profile.settings['background_reuse_threshold'])
 
         self.motor_step = profile.settings['motor_step_scanning']
         self.motor_speed = profile.settings['motor_speed_scanning']
@@ -85,7 +105,10 @@ class CiclopScan(Scan):
             self.semaphore = threading.Semaphore()
         else:
             self.semaphore = None
-
+        self.set_process_workers(profile.settings['scan_process_workers'])
+        self.set_pipelined_capture(profile.settings['scan_pipelined_capture'])
+        self.set_compact_capture(profile.settings['scan_compact_capture'])
+        self.set_queue_memory(profile.settings['scan_queue_memory'])
 
         self.ph_save_enable = profile.settings['ph_save_enable']
         self.ph_save_folder = profile.settings['ph_save_folder']
@@ -104,6 +127,9 @@ class CiclopScan(Scan):
         else:
             self.texture_mode = 2
 
+    def set_texture_steps(self, value):
+        self.texture_steps = max(1, int(value))
+
     def set_color(self, value):
         self.color = decode_color(value) 
 
@@ -116,6 +142,12 @@ class CiclopScan(Scan):
     def set_use_right_laser(self, value):
         self.laser[1] = value
 
+    def set_single_exposure(self, value):
+        self.single_exposure = value
+
+    def set_background_reuse(self, policy, steps=1, threshold=0):
+        self.background_reuse = (policy, steps, threshold)
+
     def set_move_motor(self, value):
         self.move_motor = value
 
@@ -134,15 +166,43 @@ class CiclopScan(Scan):
     def set_scan_sleep(self, value):
         self._scan_sleep = value / 1000.
 
+    def set_process_workers(self, value):
+        self._process_workers = max(1, int(value))
+
+    def set_pipelined_capture(self, value):
+        self._pipelined_capture = value
+
+    def set_compact_capture(self, value):
+        self.compact_capture = value
+
+    def set_queue_memory(self, value):
+        self.queue_memory = value
+
+    def expected_point_count(self):
+        # Upper estimate of scan size: a point per image row for each laser and step
+        steps = 1
+        if self.motor_step != 0:
+            steps = int(np.ceil(360. / abs(self.motor_step)))
+        return steps * max(1, self.laser.count(True)) * self.calibration_data.height
+
     def _initialize(self):
         self.image = None
         self.image_capture.stream = False
         self._theta = 0
         self._count = 0
         self._progress = 0
-        self._captures_queue.queue.clear()
+        self._texture = (None, None)
         self.capturing = False
+        self._step_time = 0
         self._begin = time.time()
+        self.point_cloud_generation.set_motor_step(self.motor_step)
+        self.image_capture.set_background_policy(*self.background_reuse)
+        # Single exposure needs laser lines separated by ROI bounds
+        self._exclusive = self.single_exposure and all(self.laser) and \
+            all(self.point_cloud_roi.get_laser_bounds(i, True) is not None
+                for i in xrange(len(self.laser)))
+        if self.single_exposure and not self._exclusive:
+            logger.info("Single exposure capture needs both lasers and ROI, using one exposure per laser")
 
         # Setup console
         logger.info("Start scan")
@@ -171,12 +231,17 @@ class CiclopScan(Scan):
             print self.ph_save_folder
             os.makedirs(self.ph_save_folder)
 
+        depth = self._queue_depth()
+        self._captures_queue = Queue.Queue(depth)
+        self._setup_frame_pool(depth)
+
     def _capture(self):
         self.capturing = True
+        begin = None
         while self.is_scanning:
             if self._inactive:
                 self.image_capture.stream = True
-                time.sleep(0.1)
+                self._wait_active()
             else:
                 self.image_capture.stream = False
                 if abs(self._theta) >= 360.0:
@@ -191,7 +256,8 @@ class CiclopScan(Scan):
                         if self.semaphore is not None:
                             self.semaphore.release()
                         # Put images into queue
-                        self._captures_queue.put(capture)
+                        if not self._put_capture(capture):
+                            break
                     except Exception as e:
                         logger.info("Capture error: "+str(e))
                         self.is_scanning = False
@@ -202,7 +268,10 @@ class CiclopScan(Scan):
 
                     # Move motor
                     if self.move_motor:
-                        self.driver.board.motor_move(self.motor_step)
+                        if self._pipelined_capture:
+                            self._move_motor_pipelined()
+                        else:
+                            self.driver.board.motor_move(self.motor_step)
                     else:
                         time.sleep(0.130)  # Time for 0.45º movement
 
@@ -232,12 +301,126 @@ class CiclopScan(Scan):
                         print string_time + " capture: {0} ms".format(
                             int((self._end - begin) * 1000))
             # Sleep
-            time.sleep(self._scan_sleep)
+            if not self._pipelined_capture:
+                time.sleep(self._scan_sleep)
+            if begin is not None:
+                # Step wall time, from capture start to next capture
+                self._step_time += time.time() - begin
+                begin = None
+
+        # End of scan sentinel
+        self._put_capture(None)
 
         self.driver.board.lasers_off()
         self.driver.board.motor_disable()
+        self.image_capture.set_background_policy('Never')
+        self.driver.camera.frame_pool.set_size(self._frame_pool_size)
         self.capturing = False
         self.image_capture.stream = True
+        if self._count > 0:
+            logger.info("Capture step {0} ms{1}".format(
+                int(self._step_time * 1000 / self._count),
+                " (pipelined)" if self._pipelined_capture else ""))
+
+    def _capture_frames(self):
+        # Frames held by one capture: RGB frames, single plane frames
+        if self._exclusive:
+            lasers = 1
+        else:
+            lasers = self.laser.count(True)
+        rgb, planes = lasers + 1, 0
+        if self.compact_capture:
+            # Laser planes, background only for laser colors or photos
+            rgb, planes = 0, lasers
+            if self.texture_mode == 3 or self.ph_save_enable:
+                rgb += 1
+        if self.texture_mode == 2:
+            # Texture frame is shared between steps
+            rgb += 1. / self.texture_steps
+        return rgb, planes
+
+    def _queue_depth(self):
+        # Captures in flight that fit into queue memory budget
+        size = self.calibration_data.width * self.calibration_data.height
+        rgb, planes = self._capture_frames()
+        depth = max(2, int(self.queue_memory * 2 ** 20 / (size * (3 * rgb + planes))))
+        logger.info("Scan capture queue depth {0}".format(depth))
+        return depth
+
+    def _setup_frame_pool(self, depth):
+        # Pool buffers for queued and processed captures, plus camera
+        # grabber ring, orientation and current video frames
+        rgb, planes = self._capture_frames()
+        frames = int(np.ceil(rgb + planes)) + 1
+        pool = self.driver.camera.frame_pool
+        self._frame_pool_size = pool.size
+        pool.set_size(frames * (depth + 2 * self._process_workers + 1) + 8)
+
+    def _put_capture(self, capture):
+        # Blocking put, gives up if scan is stopped while queue is full
+        while True:
+            try:
+                self._captures_queue.put(capture, timeout=0.1)
+                return True
+            except Queue.Full:
+                if not self.is_scanning:
+                    return False
+
+    def _move_motor_pipelined(self):
+        # Move platform without blocking and meanwhile switch camera
+        # to the mode of the next capture and drain stale frames
+        board = self.driver.board
+        if not board.is_connected:
+            # Board never replies to skipped commands
+            board.motor_move(self.motor_step)
+            return
+
+        moved = threading.Event()
+        moved_time = []
+
+        def move_done(ret):
+            moved_time.append(time.time())
+            moved.set()
+
+        # Bounded wait for board reply, move at scan speed plus margin
+        deadline = time.time() + self._move_timeout + \
+            abs(self.motor_step) / max(self.motor_speed, 1.)
+        board.motor_move(self.motor_step, nonblocking=True, callback=move_done)
+        if self._texture_step(self._count + 1):
+            self.image_capture.set_mode_texture()
+        else:
+            self.image_capture.set_mode_laser()
+        grabbing = self.driver.camera.is_grabbing
+        while not moved.is_set() and self.is_scanning and time.time() < deadline:
+            if grabbing:
+                # Grabber ring already drops stale frames
+                moved.wait(0.1)
+            else:
+                self._drain_frame()
+        if not self.is_scanning:
+            return
+        if not moved.is_set():
+            # Blocking command returns after pending move is answered
+            logger.warning("Motor move reply timed out")
+            board.motor_move(0)
+            moved_time.append(time.time())
+        # Same scan sleep after board reply as in sequential capture,
+        # frames exposed during the move are dropped
+        settle = moved_time[0] + self._scan_sleep
+        if grabbing:
+            time.sleep(max(0, settle - time.time()))
+        else:
+            while time.time() < settle:
+                self._drain_frame()
+
+    def _drain_frame(self):
+        if self.image_capture.capture_image(rgb=False) is None:
+            time.sleep(0.01)
+
+    def _texture_step(self, count):
+        # Capture with given count takes a new texture frame
+        return self.texture_mode == 2 and \
+            (count % self.texture_steps == 0 or self._texture[0] is None)
 
     def _capture_images(self):
         capture = ScanCapture(lasers = len(self.laser))
@@ -245,14 +428,20 @@ class CiclopScan(Scan):
         capture.count = self._count
 
         if self.texture_mode == 2:
-            capture.texture = self.image_capture.capture_texture()
-
-        if all(self.laser):
+            # Texture every N steps, the last one is reused in between
+            if self._texture_step(capture.count):
+                self._texture = (self.image_capture.capture_texture(), capture.theta)
+            capture.texture, capture.texture_theta = self._texture
+
+        if self._exclusive:
+            # One exposure, laser lines split by exclusive ROI bounds
+            image, capture.lasers[-1] = self.image_capture.capture_all_lasers(True)
+            capture.lasers[:-1] = [image] * len(self.laser)
+        elif all(self.laser):
             capture.lasers = self.image_capture.capture_lasers()
         else:
             for i in xrange(len(self.laser)):
                 if self.laser[i]:
-                    # TODO Use previous captured background
                     capture.lasers[i],capture.lasers[-1] = self.image_capture.capture_laser(i)
 
         # Set current video images
@@ -261,38 +450,82 @@ class CiclopScan(Scan):
         else:
             self.current_video.set_texture(capture.texture)
         self.current_video.set_laser(capture.lasers)
+        if self.compact_capture:
+            self._compact_capture(capture)
         return capture
 
+    def _compact_capture(self, capture):
+        # Reduce laser images to detector plane, RGB background is kept
+        # only where colors or photos are taken from it
+        lasers = capture.lasers
+        pool = self.driver.camera.frame_pool
+        if self._exclusive:
+            lasers[:-1] = [self._compute_laser_plane(lasers[0], pool)] * (len(lasers) - 1)
+        else:
+            lasers[:-1] = [self._compute_laser_plane(image, pool) for image in lasers[:-1]]
+        texture_photo = capture.texture is not None and capture.texture_theta == capture.theta
+        if self.texture_mode != 3 and not (self.ph_save_enable and not texture_photo and
+                                           capture.count % self.ph_save_divider == 0):
+            lasers[-1] = None
+
+    def _compute_laser_plane(self, image, pool):
+        if image is not None:
+            return self.laser_segmentation.compute_laser_plane(image, pool.get(image.shape[:2]))
+
     def _process(self):
         ret = False
+        # Worker pool: captures are computed in parallel and delivered
+        # in queue (count) order from the pending FIFO
+        pool = None
+        if self._process_workers > 1:
+            pool = ThreadPool(self._process_workers)
+        pending = collections.deque()
         while self.is_scanning:
             if self._inactive:
                 self.image_detection.stream = True
-                time.sleep(0.1)
+                self._wait_active()
             else:
                 self.image_detection.stream = False
-                if not self._captures_queue.empty():
-                    # Get capture from queue
-                    capture = self._captures_queue.get(timeout=0.1)
-                    self._captures_queue.task_done()
-                    # Process capture
-                    self._process_capture(capture)
+                try:
+                    # Get capture from queue, short wait while results are pending
+                    capture = self._captures_queue.get(timeout=0.01 if pending else 0.1)
+                except Queue.Empty:
+                    if pending:
+                        # Deliver results while waiting
+                        self._deliver_pending(pending)
+                    continue
+                self._captures_queue.task_done()
+
+                if capture is None:
+                    while pending:
+                        self._deliver_pending(pending)
+                    print("No more data expected. Shutdown processing thread.")
+                    self.is_scanning = False
+                    ret = True
+                    break
 
-                    # if last data processed
-                    if capture.theta >= 2*np.pi: # 360.0:
-                        print("Final angle processed. Shutdown processing thread.")
-                        self.is_scanning = False
-                        ret = True
-                        break
+                # Process capture
+                if pool is None:
+                    self._process_capture(capture)
                 else:
-                    if self.capturing:
-                        # Wait for more data
-                        time.sleep(0.1)
-                    else:
-                        print("No more data expected. Shutdown processing thread.")
-                        self.is_scanning = False
-                        ret = True
-                        break
+                    pending.append((capture, pool.apply_async(self._compute_capture, (capture,))))
+                    # Deliver finished captures, block when all workers are busy
+                    while pending and (pending[0][1].ready() or
+                                       len(pending) >= 2 * self._process_workers):
+                        self._deliver_pending(pending)
+
+                # if last data processed
+                if capture.theta >= 2*np.pi: # 360.0:
+                    while pending:
+                        self._deliver_pending(pending)
+                    print("Final angle processed. Shutdown processing thread.")
+                    self.is_scanning = False
+                    ret = True
+                    break
+
+        if pool is not None:
+            pool.close()
+            pool.join()
 
         if ret:
             response = (True, None)
@@ -318,10 +551,17 @@ class CiclopScan(Scan):
             self._after_callback(response)
 
 
+    def _deliver_pending(self, pending):
+        capture, result = pending.popleft()
+        self._deliver_capture(capture, result.get())
+
     def _process_capture(self, capture):
-        # Current video arrays
-        image = None
-        points = [None, None]
+        self._deliver_capture(capture, self._compute_capture(capture))
+
+    def _compute_capture(self, capture):
+        # Compute point clouds and textures for each laser
+        #   returns list of (laser index, points_2d, columns, point_cloud, texture)
+        results = []
 
         #print("Process start: {0:f}".format(np.rad2deg(capture.theta)))
         # begin = time.time()
@@ -332,65 +572,114 @@ class CiclopScan(Scan):
                     self.semaphore.acquire()
                 image = capture.lasers[i]
                 self.image = image
-                # Compute 2D points from images
-                points_2d, image = self.laser_segmentation.compute_2d_points(image)
-                points[i] = points_2d
-
-                # Compute point cloud texture
-                u, v = points_2d
-                texture = None
-                if self.texture_mode == 1:
-                    # Multi color
-                    r, g, b = self.colors[i]
-                    texture = np.zeros((3, len(v)), np.uint8)
-                    texture[0, :] = r
-                    texture[1, :] = g
-                    texture[2, :] = b
-
-                elif self.texture_mode == 2:
-                    # Texture
-                    if capture.texture is not None:
-                        texture = capture.texture[v, np.around(u).astype(int)].T
-
-                elif self.texture_mode == 3:
-                    # Laser BG
-                    if capture.lasers[-1] is not None:
-                        texture = capture.lasers[-1][v, np.around(u).astype(int)].T
-
-                if texture is None:
-                    # Flat color fallback
-                    r, g, b = self.color
-                    texture = np.zeros((3, len(v)), np.uint8)
-                    texture[0, :] = r
-                    texture[1, :] = g
-                    texture[2, :] = b
+                # Compute 2D points from images, ROI laser image is not needed
+                points_2d, _, _ = self.laser_segmentation.compute_2d_points_cropped(
+                    image, i, self._exclusive)
 
                 point_cloud = self.point_cloud_generation.compute_point_cloud(
                     capture.theta, points_2d, i)
-                #print("Processed: {0:f} - {1}".format(np.rad2deg(capture.theta),i))
 
-                if self.point_cloud_callback:
-                    self.point_cloud_callback(self._range, self._progress,
-                                              (point_cloud, texture), (i, capture.count, capture.theta))
+                # Compute point cloud texture
+                columns = self._round_columns(points_2d[0])
+                texture = self._compute_colors(i, capture, points_2d, columns, point_cloud)
+
+                #print("Processed: {0:f} - {1}".format(np.rad2deg(capture.theta),i))
+                results.append((i, points_2d, columns, point_cloud, texture))
 
                 if self.semaphore is not None:
                     self.semaphore.release()
+        return results
+
+    def _compute_colors(self, index, capture, points_2d, columns, point_cloud):
+        # Point colors (3, n), constant colors are read only views
+        v = points_2d[1]
+        if self.texture_mode == 1:
+            # Multi color
+            return self._constant_colors(self.colors[index], len(v))
+
+        elif self.texture_mode == 2:
+            # Texture
+            if capture.texture is not None:
+                if capture.texture_theta == capture.theta or point_cloud is None:
+                    return capture.texture[v, columns].T
+                else:
+                    return self._reproject_texture(
+                        point_cloud, capture.texture, capture.texture_theta)
+
+        elif self.texture_mode == 3:
+            # Laser BG
+            if capture.lasers[-1] is not None:
+                return capture.lasers[-1][v, columns].T
+
+        # Flat color fallback
+        return self._constant_colors(self.color, len(v))
+
+    def _constant_colors(self, color, count):
+        # Slice of cached broadcast view of one color column
+        color = tuple(color)
+        colors = self._color_views.get(color)
+        if colors is None or colors.shape[1] < count:
+            colors = np.broadcast_to(np.array(color, np.uint8)[:, np.newaxis],
+                                     (3, max(count, self.calibration_data.height)))
+            self._color_views[color] = colors
+        return colors[:, :count]
+
+    def _round_columns(self, u):
+        # Rounded u into reusable index buffer, returned after delivery
+        try:
+            buf = self._column_buffers.pop()
+        except IndexError:
+            buf = np.empty(self.calibration_data.height, np.intp)
+        if len(buf) < len(u):
+            buf = np.empty(len(u), np.intp)
+        return np.rint(u, out=buf[:len(u)], casting='unsafe')
+
+    def _reproject_texture(self, point_cloud, texture, theta):
+        # Sample colors from texture frame taken at other platform position
+        u, v = self.point_cloud_generation.project_point_cloud(point_cloud, theta)
+        u = np.around(u).astype(int)
+        v = np.around(v).astype(int)
+        h, w = texture.shape[:2]
+        inside = (u >= 0) & (u < w) & (v >= 0) & (v < h)
+        # Points out of texture frame get flat color
+        ret = np.empty((3, len(u)), np.uint8)
+        ret[:] = np.array(self.color, np.uint8)[:, np.newaxis]
+        ret[:, inside] = texture[v[inside], u[inside]].T
+        return ret
+
+    def _deliver_capture(self, capture, results):
+        # Current video arrays
+        points = [None, None]
+
+        for i, points_2d, columns, point_cloud, texture in results:
+            points[i] = (columns, points_2d[1])
+            if self.point_cloud_callback:
+                self.point_cloud_callback(self._range, self._progress,
+                                          (point_cloud, texture), (i, capture.count, capture.theta))
+
         # Photogrammetry
         if self.semaphore is not None:
             self.semaphore.acquire()
         if self.ph_save_enable and capture.count % self.ph_save_divider == 0:
             filename = self.ph_save_folder + "/img{:03.03f}.png".format(np.rad2deg(capture.theta))
             #print filename
-            if capture.texture is not None:
+            if capture.texture is not None and capture.texture_theta == capture.theta:
                 self.driver.camera.save_image(filename, capture.texture)
             elif capture.lasers[-1] is not None:
                 self.driver.camera.save_image(filename, capture.lasers[-1])
 
         # Set current video images
         self.current_video.set_gray(capture.lasers[:-1])
-        self.current_video.set_line(points, capture.lasers[-1])
+        background = capture.lasers[-1]
+        if background is None:
+            background = capture.texture
+        if background is not None:
+            self.current_video.set_line(points, background)
         if self.semaphore is not None:
             self.semaphore.release()
+        capture.release()
+        for result in results:
+            self._column_buffers.append(result[2].base)
 
         # Print info
         #print("Process end: {0:f} {1}ms".format(np.rad2deg(capture.theta), int((time.time() - begin) * 1000) ))
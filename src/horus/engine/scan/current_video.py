@@ -6,6 +6,7 @@ __copyright__ = 'Copyright (C) 2014-2016 Mundo Reader S.L.'
 __license__ = 'GNU General Public License v2 http://www.gnu.org/licenses/gpl2.html'
 
 import cv2
+import threading
 import numpy as np
 from itertools import cycle
 
@@ -15,43 +16,72 @@ from horus import Singleton
 @Singleton
 class CurrentVideo(object):
 
+    """Latest scan images, composed for current mode on capture"""
+
     def __init__(self):
         self.mode = 'Texture'
 
+        # Raw inputs and images composed from them
+        self._inputs = {}
         self.images = {}
-        self.images['Texture'] = None
-        self.images['Laser'] = None
-        self.images['Gray'] = None
-        self.images['Line'] = None
+        for mode in ('Texture', 'Laser', 'Gray', 'Line'):
+            self._inputs[mode] = None
+            self.images[mode] = None
+        self._lock = threading.Lock()
 
     def set_texture(self, image):
-        self.images['Texture'] = image
+        self._set_input('Texture', image)
 
     def set_laser(self, images):
-        image = self._combine_images(images)
-        self.images['Laser'] = image
+        self._set_input('Laser', list(images))
 
     def set_gray(self, images):
         if images is not None:
-            image = self._combine_images(images)
-            if image is not None:
-                image = cv2.merge((image, image, image))
-        self.images['Gray'] = image
+            images = list(images)
+        self._set_input('Gray', images)
 
     def set_line(self, points, image):
+        # points - (u, v) per laser, u may be rounded column indices
         if image is None:
             return
+        # Copy u, scan reuses column index buffers while line is composed
+        points = [(np.array(p[0]), p[1]) if p else p for p in points]
+        self._set_input('Line', (points, image))
+
+    def _set_input(self, mode, value):
+        with self._lock:
+            self._inputs[mode] = value
+            self.images[mode] = None
+
+    def _compose(self, mode, value):
+        if mode == 'Texture':
+            return value
+        elif mode == 'Laser':
+            return self._combine_images(value)
+        elif mode == 'Gray':
+            image = self._combine_images(value)
+            if image is not None:
+                image = cv2.merge((image, image, image))
+            return image
+        elif mode == 'Line':
+            return self._compose_line(*value)
 
+    def _compose_line(self, points, image):
         line_colors = cycle([[255,0,0],[0,255,255],[0,255,0],[255,0,255]])
         lines = np.zeros_like(image)
         for p in points:
             c = next(line_colors)
             if p:
-                lines[p[1].astype(int), np.around(p[0]).astype(int)] = c
+                u, v = p
+                if u.dtype.kind == 'f':
+                    u = np.around(u).astype(int)
+                lines[v, u] = c
 
-        self.images['Line'] = cv2.addWeighted(image,0.5,lines,1.,0.)
+        return cv2.addWeighted(image,0.5,lines,1.,0.)
 
     def _combine_images(self, images):
+        if images is None:
+            return None
         im = [i for i in images if i is not None]
         if len(im)>0:
             return np.max(im, axis=0)
@@ -70,4 +100,14 @@ class CurrentVideo(object):
             return image
 
     def capture(self):
-        return self.images[self.mode]
+        # Compose image of current mode once per new input
+        mode = self.mode
+        with self._lock:
+            image = self.images[mode]
+            value = self._inputs[mode]
+        if image is None and value is not None:
+            image = self._compose(mode, value)
+            with self._lock:
+                if self._inputs[mode] is value:
+                    self.images[mode] = image
+        return image
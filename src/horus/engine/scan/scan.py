@@ -41,6 +41,7 @@ class Scan(object):
         self._progress = 0
         self._range = 0
         self._inactive = False
+        self._active_condition = threading.Condition()
 
     def set_callbacks(self, before, progress, after):
         self._before_callback = before
@@ -64,14 +65,28 @@ class Scan(object):
             threading.Thread(target=self._process).start()
 
     def stop(self):
-        self._inactive = False
-        self.is_scanning = False
+        with self._active_condition:
+            self._inactive = False
+            self.is_scanning = False
+            self._active_condition.notify_all()
 
     def pause(self):
-        self._inactive = True
+        self._set_inactive(True)
 
     def resume(self):
-        self._inactive = False
+        self._set_inactive(False)
+
+    def _set_inactive(self, value):
+        # Update pause state and wake up waiting threads
+        with self._active_condition:
+            self._inactive = value
+            self._active_condition.notify_all()
+
+    def _wait_active(self):
+        # Block while paused
+        with self._active_condition:
+            while self._inactive and self.is_scanning:
+                self._active_condition.wait(0.5)
 
     def _initialize(self):
         pass
@@ -11,4 +11,10 @@ class ScanCapture(object):
     def __init__(self, lasers = 2):
         self.theta = 0
         self.texture = None
+        self.texture_theta = None  # platform position of texture frame
         self.lasers = [None]*(lasers+1)
+
+    def release(self):
+        # Drop frames, pool buffers are reused once unreferenced
+        self.texture = None
+        self.lasers = [None]*len(self.lasers)
@@ -15,7 +15,8 @@ from collections import OrderedDict
 
 from horus import __version__, __datetime__, __commit__
 from horus.gui.engine import driver, image_capture, ciclop_scan, scanner_autocheck, \
-    laser_triangulation, platform_extrinsics
+    laser_triangulation, platform_extrinsics, camera_latency
+from horus.engine.calibration.camera_latency import get_flush_profile
 
 from horus.gui.welcome import WelcomeDialog
 from horus.gui.util.preferences import PreferencesDialog
@@ -122,6 +123,7 @@ class MainWindow(wx.Frame):
         # Menu Edit
         self.menu_edit = wx.Menu()
         self.menu_preferences = self.menu_edit.Append(wx.NewId(), _("Preferences"))
+        self.menu_camera_latency = self.menu_edit.Append(wx.NewId(), _("Profile camera latency"))
         # self.menu_machine_settings = self.menu_edit.Append(wx.NewId(), _("Machine settings"))
         self.menu_bar.Append(self.menu_edit, _("Edit"))
 
@@ -170,6 +172,7 @@ class MainWindow(wx.Frame):
         self.Bind(wx.EVT_MENU, self.on_exit, self.menu_exit)
 
         self.Bind(wx.EVT_MENU, self.on_preferences, self.menu_preferences)
+        self.Bind(wx.EVT_MENU, self.on_camera_latency, self.menu_camera_latency)
         # self.Bind(wx.EVT_MENU, self.on_machine_settings, self.menu_machine_settings)
 
         self.Bind(wx.EVT_MENU, self.on_scanning_panel_clicked, self.menu_scanning_panel)
@@ -351,6 +354,24 @@ class MainWindow(wx.Frame):
         preferences = PreferencesDialog(basic=basic)
         preferences.ShowModal()
 
+    def on_camera_latency(self, event):
+        if driver.is_connected:
+            camera_latency.set_callbacks(
+                None, None, lambda r: wx.CallAfter(self.on_camera_latency_finished, r))
+            camera_latency.start()
+
+    def on_camera_latency_finished(self, response):
+        ret, result = response
+        if ret:
+            key, flush = result
+            message = _("Flush values for {0}: texture {1}, laser {2}, pattern {3}, "
+                        "change mode {4}").format(key, *flush)
+            dlg = wx.MessageDialog(self, message, _("Camera latency"), wx.OK | wx.ICON_INFORMATION)
+        else:
+            dlg = wx.MessageDialog(self, str(result), _("Camera latency"), wx.OK | wx.ICON_ERROR)
+        dlg.ShowModal()
+        dlg.Destroy()
+
     """def on_machine_settings(self, event):
         machine_settings = MachineSettingsDialog(self)
         ret = machine_settings.ShowModal()
@@ -454,6 +475,8 @@ class MainWindow(wx.Frame):
         self.Layout()
 
     def on_connect(self):
+        # Camera resolution and frame rate are known after connect
+        self.update_flush_values()
         for workbench in self.workbench.values():
             workbench.enable_content()
         self.workbench[profile.settings['workbench']].on_connect()
@@ -633,6 +656,9 @@ class MainWindow(wx.Frame):
         driver.board.baud_rate = profile.settings['baud_rate']
         driver.board.motor_invert(profile.settings['invert_motor'])
 
+        self.update_flush_values()
+
+    def update_flush_values(self):
         flush_setting = 'flush_'
         flush_stream_setting = 'flush_stream_'
         if sys.is_linux():
@@ -646,6 +672,10 @@ class MainWindow(wx.Frame):
             flush_stream_setting += 'windows'
 
         texture, laser, pattern, chmode = profile.settings[flush_setting]
+        # Measured values for camera resolution and frame rate in use
+        flush_profile = get_flush_profile()
+        if flush_profile is not None:
+            texture, laser, pattern, chmode = flush_profile
         image_capture.set_flush_values(texture, laser, pattern, chmode)
         texture, laser, pattern, chmode = profile.settings[flush_stream_setting]
         image_capture.set_flush_stream_values(texture, laser, pattern, chmode)
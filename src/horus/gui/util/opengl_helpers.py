@@ -190,7 +190,7 @@ class GLVBO(GLReferenceCounter):
                     glBufferData(GL_ARRAY_BUFFER, vertex_array, GL_STATIC_DRAW)
                     glBindBuffer(GL_ARRAY_BUFFER, self._buffer[1])
                     glBufferData(
-                        GL_ARRAY_BUFFER, numpy.array(color_array, numpy.uint8), GL_STATIC_DRAW)
+                        GL_ARRAY_BUFFER, numpy.ascontiguousarray(color_array, numpy.uint8), GL_STATIC_DRAW)
                 else:
                     self._buffer = glGenBuffers(1)
                     glBindBuffer(GL_ARRAY_BUFFER, self._buffer)
@@ -97,11 +97,12 @@ class SceneView(opengl_gui.glGuiPanel):
                 del _object
         gc.collect()
 
-    def create_default_object(self):
+    def create_default_object(self, vertex_count=100000):
+        # vertex_count - initial point capacity, grows if exceeded
         self._clear_scene()
         self._object = model.Model(None, is_point_cloud=True)
         self._object._add_mesh()
-        self._object._mesh._prepare_vertex_count(4000000)
+        self._object._mesh._prepare_vertex_count(vertex_count)
         return self._object
 
     def append_point_cloud(self, point, color, meta=None):
@@ -583,8 +584,8 @@ class SceneView(opengl_gui.glGuiPanel):
                         obj._mesh.vbo.release()
                     obj._mesh.vbo = opengl_helpers.GLVBO(
                         GL_POINTS,
-                        obj._mesh.vertexes[:obj._mesh.vertex_count],
-                        color_array=obj._mesh.colors[:obj._mesh.vertex_count],
+                        obj._mesh.get_vertexes(),
+                        color_array=obj._mesh.get_colors(),
                         point_size=self._point_size)
                 obj._mesh.vbo.render()
         else:
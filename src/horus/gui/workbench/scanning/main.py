@@ -221,7 +221,7 @@ class ScanningWorkbench(Workbench):
         self.GetParent().Layout()
         self.pages_collection['view_page'].combo_video_views.Show()
         self.scene_view.set_show_delete_menu(False)
-        obj = self.scene_view.create_default_object()
+        obj = self.scene_view.create_default_object(ciclop_scan.expected_point_count())
         obj._mesh.metadata = {}
         meta_names = ['motor_step_scanning', 'texture_mode', 'use_laser', 'camera_matrix', 'distortion_vector',\
                 'distance_left','normal_left','distance_right','normal_right',\
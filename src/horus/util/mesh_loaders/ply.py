@@ -16,7 +16,6 @@ This module also contains a function to save objects as an PLY file.
 http://en.wikipedia.org/wiki/PLY_(file_format)
 """
 
-import struct
 import numpy as np
 import pickle
 
@@ -289,11 +288,16 @@ def save_scene_stream(stream, _object):
 
         if m.vertex_count > 0:
             if binary:
-                for i in xrange(m.vertex_count):
-                    stream.write(struct.pack("<fffBBBBif",
-                                             m.vertexes[i, 0], m.vertexes[i, 1], m.vertexes[i, 2],
-                                             m.colors[i, 0], m.colors[i, 1], m.colors[i, 2],
-                                             m.vertexes_meta[i][0], m.vertexes_meta[i][1], m.vertexes_meta[i][2]))
+                # Interleave point columns into vertex records
+                data = np.empty(m.vertex_count, dtype=[('xyz', '<f4', 3), ('rgb', 'u1', 3),
+                                                       ('index', 'u1'), ('slice', '<i4'), ('angle', '<f4')])
+                meta = m.get_meta()
+                data['xyz'] = m.get_vertexes()
+                data['rgb'] = m.get_colors()
+                data['index'] = meta['laser_id']
+                data['slice'] = meta['slice_no']
+                data['angle'] = meta['slice_l']
+                stream.write(data.tobytes())
                 if m.metadata is not None:
                     stream.write(metadata)
             else:
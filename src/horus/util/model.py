@@ -103,8 +103,9 @@ class Mesh(object):
     vertexes_meta = None  # type: ndarray
 
     def __init__(self, obj = None):
+        # Point columns have capacity for more than vertex_count points
         self.vertexes = np.zeros((0, 3), np.float32)
-        self.vertexes_meta = np.empty((0,), dtype=[('laser_id',np.int8),('slice_no','int'),('slice_l',np.float32)])
+        self.vertexes_meta = np.empty((0,), dtype=[('laser_id',np.int8),('slice_no',np.int32),('slice_l',np.float32)])
         self.colors = np.zeros((0, 3), np.uint8)
         self.normal = np.zeros((0, 3), np.float32)
         self.vertex_count = 0
@@ -118,7 +119,7 @@ class Mesh(object):
         if laser_index is None:
             laser_index=self.current_cloud_index
         n = self.vertex_count
-        # TODO extend array if required
+        self._reserve_vertex_count(n + 1)
         self.vertexes[n] = (x, y, z)
         self.colors[n]   = (r, g, b)
         self.vertexes_meta[n] = (laser_index, slice_no, slice_l)
@@ -132,34 +133,31 @@ class Mesh(object):
         #if laser_index < 0:
         #    laser_index=self.current_cloud_index
 
-        _meta = np.empty((), dtype=object)
         if meta is None:
-            #_meta[()] = (laser_index, slice_no, slice_l)
-            _meta[()] = (-1, -1, np.nan)
-        else:
-            _meta[()] = meta
-        _meta = np.full(cloud_vertex.shape[0], _meta)
+            # (laser_index, slice_no, slice_l)
+            meta = (-1, -1, np.nan)
 
         n = self.vertex_count
         m = n + cloud_vertex.shape[0]
-        if m >= self.vertexes.shape[0]:
-            if self.vertexes.shape[0] > n:
-                # shrink and append
-                self.vertexes.resize((n,3))
-                self.colors.resize((n,3))
-                #self.normal.resize((n,3))
-                self.vertexes_meta.resize(n, refcheck=False) #+self.vertexes_meta.shape[1:])
-
-            self.vertexes      = np.append( self.vertexes,      cloud_vertex, axis=0)
-            self.colors        = np.append( self.colors,        cloud_color,  axis=0)
-            self.vertexes_meta = np.append( self.vertexes_meta, _meta,        axis=0)
-        else:
-            self.vertexes[n:m] = cloud_vertex
-            self.colors[n:m] = cloud_color
-            self.vertexes_meta[n:m] = _meta
+        self._reserve_vertex_count(m)
+        self.vertexes[n:m] = cloud_vertex
+        self.colors[n:m] = cloud_color
+        self.vertexes_meta[n:m] = meta
 
         self.vertex_count = m
 
+    def _reserve_vertex_count(self, vertex_number):
+        # Grow point columns geometrically, appends are amortized O(1)
+        capacity = self.vertexes.shape[0]
+        if vertex_number > capacity:
+            capacity = max(vertex_number, 2 * capacity, 1024)
+            n = self.vertex_count
+            for name in ('vertexes', 'colors', 'vertexes_meta'):
+                column = getattr(self, name)
+                grown = np.zeros((capacity,) + column.shape[1:], column.dtype)
+                grown[:n] = column[:n]
+                setattr(self, name, grown)
+
     def _add_face(self, x0, y0, z0, x1, y1, z1, x2, y2, z2):
         n = self.vertex_count
         self.vertexes[n], self.vertexes[
@@ -170,11 +168,10 @@ class Mesh(object):
         # Set the amount of vertex before loading data in them. This way we can
         # create the np arrays before we fill them.
         self.vertexes = np.zeros((vertex_number, 3), np.float32)
-        self.colors = np.zeros((vertex_number, 3), np.int32)
+        self.colors = np.zeros((vertex_number, 3), np.uint8)
         self.normal = np.zeros((vertex_number, 3), np.float32)
-        meta = np.empty((), dtype=object)
-        meta[()] = (-1, -1, np.nan)
-        self.vertexes_meta = np.full(vertex_number, meta, dtype=self.vertexes_meta.dtype)
+        self.vertexes_meta = np.empty(vertex_number, dtype=self.vertexes_meta.dtype)
+        self.vertexes_meta[:] = (-1, -1, np.nan)
         self.vertex_count = 0
         return self
 
@@ -196,6 +193,9 @@ class Mesh(object):
     def get_vertexes(self):
         return self.vertexes[0:self.vertex_count]
 
+    def get_colors(self):
+        return self.colors[0:self.vertex_count]
+
     def get_meta(self):
         return self.vertexes_meta[0:self.vertex_count]
 
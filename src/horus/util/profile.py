@@ -358,6 +358,9 @@ class Settings(collections.MutableMapping):
         self._add_setting(
             Setting('flush_stream_windows', 'Flush stream Windows', 'preferences',
                     np.ndarray, np.ndarray(shape=(4,), dtype=int, buffer=np.array([0, 3, 3, 0]))))
+        # - Measured by camera latency profiler, "WxH@fps": [ texture, laser, pattern, change mode ]
+        self._add_setting(
+            Setting('flush_profiles', 'Flush profiles', 'preferences', dict, {}))
 
 
         # ========== Segmentation profiles ===========
@@ -388,7 +391,8 @@ class Settings(collections.MutableMapping):
         self._add_setting(
             Setting('refinement_calibration', _('Refinement'), 'profile_settings',
                     unicode, u'RANSAC',
-                    possible_values=(u'None', u'SGF', u'RANSAC')))
+                    possible_values=(u'None', u'SGF', u'RANSAC',
+                                     u'Parabolic', u'Gaussian', u'Blais-Rioux')))
 
         # -------- Scanning --------
         self._add_setting(
@@ -416,7 +420,17 @@ class Settings(collections.MutableMapping):
         self._add_setting(
             Setting('refinement_scanning', _('Refinement'), 'profile_settings',
                     unicode, u'SGF',
-                    possible_values=(u'None', u'SGF')))
+                    possible_values=(u'None', u'SGF', u'RANSAC',
+                                     u'Parabolic', u'Gaussian', u'Blais-Rioux')))
+
+        # -------- Common --------
+        self._add_setting(
+            Setting('segmentation_roi_crop', _('Segment ROI area only'),
+                    'profile_settings', bool, True))
+        self._add_setting(
+            Setting('peak_kernel', _('Peak detection kernel'), 'profile_settings',
+                    unicode, u'Index vector',
+                    possible_values=(u'Weight matrix', u'Index vector')))
 
 
         # ==================== CONTROL workbench ================
@@ -583,6 +597,10 @@ class Settings(collections.MutableMapping):
         self._add_setting(
             Setting('camera_capture_before_set', _('Capture a frame right after connect before setting camera'), 'profile_settings', bool, False))
 
+        # read frames continuously in background, capture waits for first frame exposed after request
+        self._add_setting(
+            Setting('camera_frame_grabber', _('Grab camera frames in background'), 'profile_settings', bool, False))
+
         self._add_setting(
             Setting('camera_width', _('Width'), 'calibration_settings',
                     int, -1, min_value=-1, max_value=10000))
@@ -670,6 +688,22 @@ class Settings(collections.MutableMapping):
             Setting('use_laser', _('Use laser'), 'profile_settings',
                     unicode, u'Both', possible_values=(u'Left', u'Right', u'Both')))
 
+        self._add_setting(
+            Setting('background_reuse', _('Reuse laser background'), 'profile_settings',
+                    unicode, u'Never', possible_values=(u'Never', u'Steps', u'Difference', u'Texture')))
+
+        self._add_setting(
+            Setting('background_reuse_steps', _('Background reuse steps'), 'profile_settings',
+                    int, 4, min_value=1, max_value=100))
+
+        self._add_setting(
+            Setting('background_reuse_threshold', _('Background reuse difference'), 'profile_settings',
+                    float, 2.0, min_value=0.0, max_value=255.0))
+
+        self._add_setting(
+            Setting('single_exposure_lasers', _('Capture both lasers in one exposure'),
+                    'profile_settings', bool, False))
+
         # ----------- Rotating platform ----------
         self._add_setting(
             Setting('motor_step_scanning', _(u'Step (º)'), 'profile_settings',
@@ -699,6 +733,10 @@ class Settings(collections.MutableMapping):
                     unicode, u'Texture',
                     possible_values=(u'Flat color', u'Multi color', u'Capture', u'Laser BG')))
 
+        self._add_setting(
+            Setting('texture_capture_steps', _('Capture texture every N steps'), 'profile_settings',
+                    int, 1, min_value=1, max_value=100))
+
         self._add_setting(
             Setting('point_cloud_color', _('Cloud color'), 'profile_settings',
                     list, [170,170,170]))
@@ -737,6 +775,22 @@ class Settings(collections.MutableMapping):
             Setting('scan_sync_threads', _('Synchronize capture and process threads'),
                     'profile_settings', bool, False))
 
+        self._add_setting(
+            Setting('scan_pipelined_capture', _('Prepare next capture while the platform moves'),
+                    'profile_settings', bool, False))
+
+        self._add_setting(
+            Setting('scan_process_workers', _('Scan processing threads'), 'profile_settings',
+                    int, 1, min_value=1, max_value=8))
+
+        self._add_setting(
+            Setting('scan_compact_capture', _('Keep only laser detector plane of scan captures'),
+                    'profile_settings', bool, False))
+
+        self._add_setting(
+            Setting('scan_queue_memory', _('Scan capture queue memory (MB)'), 'profile_settings',
+                    int, 150, min_value=16, max_value=4096))
+
 
 
         # ========== MACHINE Profile ==============
@@ -0,0 +1,89 @@
+import threading
+import time
+import numpy as np
+
+from horus.engine.driver.frame_pool import FramePool
+
+
+class FakeCamera(object):
+
+    """Camera returning numbered frames, controls report new values only"""
+
+    def __init__(self, width=64, height=48, frame_rate=30, delay=0):
+        self.resolution = (width, height)
+        self.frame_rate = frame_rate
+        self.delay = delay
+        self.is_grabbing = True
+        self.frame_pool = FramePool()
+        self.controls = {}
+        self.captures = []
+
+    def get_resolution(self):
+        return self.resolution
+
+    def get_frame_rate(self):
+        return self.frame_rate
+
+    def _set(self, name, value):
+        if self.controls.get(name) != value:
+            self.controls[name] = value
+            time.sleep(self.delay)
+            return True
+        return False
+
+    def set_brightness(self, value):
+        return self._set('brightness', value)
+
+    def set_contrast(self, value):
+        return self._set('contrast', value)
+
+    def set_saturation(self, value):
+        return self._set('saturation', value)
+
+    def set_exposure(self, value):
+        return self._set('exposure', value)
+
+    def set_light(self, idx, value):
+        return self._set('light{0}'.format(idx), value)
+
+    def capture_image(self, flush=0, rgb=True):
+        # Frame value is the capture number
+        self.captures.append((flush, rgb))
+        width, height = self.resolution
+        return np.full((height, width, 3), len(self.captures), np.uint8)
+
+
+class FakeBoard(object):
+
+    """Board that answers moves after a delay, or never"""
+
+    def __init__(self, reply=True, delay=0.05, connected=True):
+        self.reply = reply
+        self.delay = delay
+        self.is_connected = connected
+        self.moves = []
+        self.lasers = [False, False]
+
+    def motor_move(self, step=0, nonblocking=False, callback=None):
+        self.moves.append((step, nonblocking))
+        if nonblocking and self.reply and callback is not None:
+            threading.Timer(self.delay, callback, ('ok',)).start()
+
+    def laser_on(self, index):
+        self.lasers[index] = True
+
+    def laser_off(self, index):
+        self.lasers[index] = False
+
+    def lasers_on(self):
+        self.lasers = [True, True]
+
+    def lasers_off(self):
+        self.lasers = [False, False]
+
+
+class FakeDriver(object):
+
+    def __init__(self, board=None, camera=None):
+        self.board = board if board is not None else FakeBoard()
+        self.camera = camera if camera is not None else FakeCamera()
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def setup_calibration(calibration_data, width=480, height=640, distortion=None, tilt=0):
+    # Camera 320 mm in front of turntable axis looking down by tilt degrees,
+    # laser planes through the axis at -30 and 30 degrees
+    #   returns in plane direction of each laser, from axis towards camera side
+    calibration_data.set_resolution(width, height)
+    calibration_data.camera_matrix = np.array([[700., 0, width / 2.], [0, 700., height / 2.], [0, 0, 1]])
+    if distortion is None:
+        distortion = np.zeros(5)
+    calibration_data.distortion_vector = np.array(distortion, np.float64)
+    c, s = np.cos(np.deg2rad(tilt)), np.sin(np.deg2rad(tilt))
+    calibration_data.platform_rotation = np.array([[1., 0, 0], [0, s, -c], [0, c, s]])
+    calibration_data.platform_translation = np.array([5., 80., 320.])
+    directions = []
+    for i, angle in enumerate((-30, 30)):
+        a = np.deg2rad(angle)
+        direction = np.array([np.sin(a), -np.cos(a), 0])
+        normal = np.dot(calibration_data.platform_rotation,
+                        np.array([direction[1], -direction[0], 0]))
+        calibration_data.laser_planes[i].normal = normal
+        calibration_data.laser_planes[i].distance = normal.dot(calibration_data.platform_translation)
+        directions.append(direction)
+    return directions
+
+
+def project_line(calibration_data, direction, radius, heights):
+    # Laser line on cylinder around the axis, in image coords (no distortion)
+    points = radius * direction[:, np.newaxis] + np.vstack((0 * heights, 0 * heights, heights))
+    points = np.dot(calibration_data.platform_rotation, points) + \
+        calibration_data.platform_translation[:, np.newaxis]
+    uv = np.dot(calibration_data.camera_matrix, points)
+    return uv[0] / uv[2], uv[1] / uv[2]
@@ -0,0 +1,80 @@
+import unittest
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.driver.driver import Driver
+from horus.engine.algorithms.image_capture import ImageCapture
+from horus.engine.calibration.camera_latency import flush_profile_key, get_flush_profile
+from horus.util import profile
+
+from fakes import FakeCamera, FakeDriver
+
+
+class FlushProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = Driver()
+        self.camera = self.driver.camera
+        self.driver.camera = FakeCamera(960, 1280)
+        self.flush_profiles = profile.settings['flush_profiles']
+
+    def tearDown(self):
+        self.driver.camera = self.camera
+        profile.settings['flush_profiles'] = self.flush_profiles
+
+    def test_key_from_camera(self):
+        self.assertEqual(flush_profile_key(), '960x1280@30')
+        self.driver.camera.resolution = (480, 640)
+        self.driver.camera.frame_rate = 15
+        self.assertEqual(flush_profile_key(), '480x640@15')
+        self.assertEqual(flush_profile_key(640, 480, 30), '640x480@30')
+
+    def test_get_flush_profile(self):
+        profile.settings['flush_profiles'] = {'960x1280@30': [1, 2, 1, 3]}
+        self.assertEqual(get_flush_profile(), [1, 2, 1, 3])
+        self.driver.camera.frame_rate = 15
+        self.assertIsNone(get_flush_profile())
+        self.assertEqual(get_flush_profile('960x1280@30'), [1, 2, 1, 3])
+
+
+class SetModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image_capture = ImageCapture()
+        self.camera = FakeCamera()
+        self.drivers = {}
+        for obj in (self.image_capture, self.image_capture.texture_mode,
+                    self.image_capture.laser_mode, self.image_capture.pattern_mode):
+            self.drivers[obj] = obj.driver
+            obj.driver = FakeDriver(camera=self.camera)
+        self.image_capture.stream = False
+        self.image_capture.control_latency = {}
+        self.image_capture.set_flush_values(2, 3, 2, 1)
+        self.image_capture.texture_mode.exposure = 10
+        self.image_capture.laser_mode.exposure = 10
+        self.image_capture.set_mode_texture()
+        del self.camera.captures[:]
+
+    def tearDown(self):
+        for obj, driver in self.drivers.items():
+            obj.driver = driver
+
+    def test_unchanged_mode(self):
+        # Same settings in other mode: no flush
+        self.image_capture.set_mode_laser()
+        self.image_capture.set_mode_laser()
+        self.assertEqual(self.camera.captures, [])
+
+    def test_changed_mode(self):
+        self.image_capture.laser_mode.exposure = 20
+        self.image_capture.set_mode_laser()
+        # One mode flush frame read and dropped
+        self.assertEqual(self.camera.captures, [(0, False)])
+        self.image_capture.set_mode_texture()
+        self.assertEqual(len(self.camera.captures), 2)
+
+    def test_stall_frames(self):
+        # Frames exposed while a slow control was applied are flushed too
+        self.camera.delay = 0.1
+        self.image_capture.laser_mode.exposure = 20
+        self.image_capture.set_mode_laser()
+        self.assertEqual(self.camera.captures, [(3, False)])
@@ -0,0 +1,302 @@
+import Queue
+import threading
+import time
+import unittest
+import numpy as np
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.scan.ciclop_scan import CiclopScan
+from horus.engine.scan.scan_capture import ScanCapture
+
+from fakes import FakeBoard, FakeDriver
+from helpers import setup_calibration, project_line
+
+
+class FakeImageCapture(object):
+
+    def __init__(self):
+        self.modes = []
+
+    def set_mode_texture(self):
+        self.modes.append('texture')
+
+    def set_mode_laser(self):
+        self.modes.append('laser')
+
+
+class ScanTestCase(unittest.TestCase):
+
+    # Scan is a singleton, its state is restored after each test
+
+    def setUp(self):
+        self.ciclop_scan = CiclopScan()
+        self.saved = dict(self.ciclop_scan.__dict__)
+
+    def tearDown(self):
+        self.ciclop_scan.__dict__.clear()
+        self.ciclop_scan.__dict__.update(self.saved)
+
+
+class PipelinedMoveTest(ScanTestCase):
+
+    def setUp(self):
+        ScanTestCase.setUp(self)
+        self.ciclop_scan.image_capture = FakeImageCapture()
+        self.ciclop_scan.texture_mode = 0
+        self.ciclop_scan.motor_step = 0.45
+        self.ciclop_scan.motor_speed = 200
+        self.ciclop_scan._move_timeout = 0.2
+        self.ciclop_scan.set_scan_sleep(20)
+        self.ciclop_scan.is_scanning = True
+
+    def move(self, board):
+        self.ciclop_scan.driver = FakeDriver(board)
+        begin = time.time()
+        self.ciclop_scan._move_motor_pipelined()
+        return time.time() - begin
+
+    def test_pipelined_move(self):
+        board = FakeBoard(delay=0.05)
+        elapsed = self.move(board)
+        self.assertEqual(board.moves, [(0.45, True)])
+        self.assertEqual(self.ciclop_scan.image_capture.modes, ['laser'])
+        # Board reply plus scan sleep
+        self.assertTrue(0.065 < elapsed < 0.2)
+
+    def test_pipelined_move_no_reply(self):
+        # Reply never comes, blocking move waits for pending one
+        board = FakeBoard(reply=False)
+        elapsed = self.move(board)
+        self.assertEqual(board.moves, [(0.45, True), (0, False)])
+        self.assertTrue(0.2 < elapsed < 0.5)
+
+    def test_pipelined_move_disconnected(self):
+        board = FakeBoard(reply=False, connected=False)
+        elapsed = self.move(board)
+        self.assertEqual(board.moves, [(0.45, False)])
+        self.assertTrue(elapsed < 0.05)
+
+    def test_pipelined_move_stop(self):
+        board = FakeBoard(reply=False)
+        self.ciclop_scan._move_timeout = 10
+        threading.Timer(0.05, self.ciclop_scan.stop).start()
+        elapsed = self.move(board)
+        self.assertEqual(board.moves, [(0.45, True)])
+        self.assertTrue(elapsed < 0.5)
+
+
+class ProcessTest(ScanTestCase):
+
+    def setUp(self):
+        ScanTestCase.setUp(self)
+        self.computed = []
+        self.delivered = []
+        self.responses = []
+        self.lock = threading.Lock()
+        self.ciclop_scan._compute_capture = self.compute
+        self.ciclop_scan._deliver_capture = self.deliver
+        self.ciclop_scan._after_callback = self.responses.append
+        self.ciclop_scan._captures_queue = Queue.Queue(4)
+        self.ciclop_scan._inactive = False
+        self.ciclop_scan._begin = time.time()
+        self.ciclop_scan.is_scanning = True
+
+    def compute(self, capture):
+        # Every third capture is slow, later ones finish first
+        time.sleep(0.03 if capture.count % 3 == 0 else 0.001)
+        with self.lock:
+            self.computed.append(capture.count)
+        return [capture.count]
+
+    def deliver(self, capture, results):
+        self.delivered.append((capture.count, results))
+
+    def process(self, captures, workers):
+        self.ciclop_scan.set_process_workers(workers)
+        thread = threading.Thread(target=self.ciclop_scan._process)
+        thread.start()
+        for i in xrange(captures):
+            capture = ScanCapture()
+            capture.count = i
+            capture.theta = i * 0.01
+            self.assertTrue(self.ciclop_scan._put_capture(capture))
+        self.ciclop_scan._put_capture(None)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_workers_deliver_in_order(self):
+        self.process(30, 3)
+        self.assertNotEqual(self.computed, sorted(self.computed))
+        self.assertEqual(sorted(self.computed), range(30))
+        self.assertEqual(self.delivered, [(i, [i]) for i in xrange(30)])
+        self.assertEqual(self.responses, [(True, None)])
+
+    def test_single_worker(self):
+        self.process(10, 1)
+        self.assertEqual(self.computed, range(10))
+        self.assertEqual(self.delivered, [(i, [i]) for i in xrange(10)])
+
+    def test_end_sentinel(self):
+        # Sentinel ends processing after pending results are delivered
+        self.process(4, 2)
+        self.assertEqual([d[0] for d in self.delivered], range(4))
+        self.assertFalse(self.ciclop_scan.is_scanning)
+        self.assertTrue(self.ciclop_scan._captures_queue.empty())
+
+    def test_stop_while_queue_full(self):
+        # Capture thread blocked on full queue gives up on stop
+        result = []
+        for i in xrange(4):
+            self.assertTrue(self.ciclop_scan._put_capture(ScanCapture()))
+        thread = threading.Thread(target=lambda: result.append(
+            self.ciclop_scan._put_capture(ScanCapture())))
+        thread.start()
+        time.sleep(0.05)
+        self.assertTrue(thread.is_alive())
+        begin = time.time()
+        self.ciclop_scan.stop()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(time.time() - begin < 0.3)
+        self.assertEqual(result, [False])
+
+    def test_stop(self):
+        # Processing ends with an error response when scan is stopped
+        self.ciclop_scan.set_process_workers(2)
+        thread = threading.Thread(target=self.ciclop_scan._process)
+        thread.start()
+        time.sleep(0.05)
+        self.ciclop_scan.stop()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(self.responses), 1)
+        self.assertFalse(self.responses[0][0])
+
+
+class CaptureQueueTest(ScanTestCase):
+
+    def setUp(self):
+        ScanTestCase.setUp(self)
+        self.ciclop_scan.calibration_data.set_resolution(960, 1280)
+        self.ciclop_scan.laser = [True, True]
+        self.ciclop_scan._exclusive = False
+        self.ciclop_scan.texture_mode = 2
+        self.ciclop_scan.set_texture_steps(1)
+        self.ciclop_scan.ph_save_enable = False
+        self.ciclop_scan.set_queue_memory(150)
+
+    def capture_bytes(self):
+        # Two laser frames and background, texture every step
+        size = 960 * 1280
+        if self.ciclop_scan.compact_capture:
+            return size * (2 + 3)
+        return size * 3 * 4
+
+    def test_queue_depth(self):
+        for compact in (False, True):
+            self.ciclop_scan.set_compact_capture(compact)
+            depth = self.ciclop_scan._queue_depth()
+            budget = 150 * 2 ** 20
+            self.assertTrue(depth * self.capture_bytes() <= budget < (depth + 1) * self.capture_bytes())
+        self.assertEqual(depth, 25)
+        # At least two captures in flight on a small budget
+        self.ciclop_scan.set_queue_memory(1)
+        self.assertEqual(self.ciclop_scan._queue_depth(), 2)
+
+    def test_queue_depth_texture_steps(self):
+        # Texture frame taken every 4 steps counts a quarter per capture
+        self.ciclop_scan.set_texture_steps(4)
+        self.ciclop_scan.set_queue_memory(1000)
+        depth = self.ciclop_scan._queue_depth()
+        self.assertEqual(depth, int(1000 * 2 ** 20 / (960 * 1280 * 3 * 3.25)))
+
+
+class CompactCaptureTest(ScanTestCase):
+
+    def setUp(self):
+        ScanTestCase.setUp(self)
+        self.ciclop_scan.driver = FakeDriver()
+        self.detector = self.ciclop_scan.laser_segmentation.laser_color_detector
+        self.ciclop_scan.laser_segmentation.laser_color_detector = 'R (RGB)'
+        self.ciclop_scan.ph_save_enable = False
+        self.ciclop_scan._exclusive = False
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 255, (48, 64, 3)).astype(np.uint8) for i in xrange(3)]
+
+    def tearDown(self):
+        self.ciclop_scan.laser_segmentation.laser_color_detector = self.detector
+        ScanTestCase.tearDown(self)
+
+    def capture(self):
+        capture = ScanCapture()
+        capture.lasers = list(self.frames)
+        capture.texture = self.frames[-1]
+        capture.texture_theta = capture.theta = 0
+        self.ciclop_scan._compact_capture(capture)
+        return capture
+
+    def test_laser_planes(self):
+        self.ciclop_scan.texture_mode = 2
+        capture = self.capture()
+        for i in xrange(2):
+            np.testing.assert_array_equal(capture.lasers[i], self.frames[i][:, :, 0])
+        # Colors come from texture, background is dropped
+        self.assertIsNone(capture.lasers[-1])
+        self.assertIs(capture.texture, self.frames[-1])
+
+    def test_laser_background_colors(self):
+        self.ciclop_scan.texture_mode = 3
+        capture = self.capture()
+        self.assertIs(capture.lasers[-1], self.frames[-1])
+
+    def test_exclusive(self):
+        # One exposure holds both laser lines, plane is computed once
+        self.ciclop_scan._exclusive = True
+        self.ciclop_scan.texture_mode = 0
+        capture = self.capture()
+        self.assertIs(capture.lasers[0], capture.lasers[1])
+        np.testing.assert_array_equal(capture.lasers[0], self.frames[0][:, :, 0])
+
+
+class ReprojectTextureTest(ScanTestCase):
+
+    def setUp(self):
+        ScanTestCase.setUp(self)
+        self.calibration_data = self.ciclop_scan.calibration_data
+        self.directions = setup_calibration(self.calibration_data)
+        self.ciclop_scan.color = (255, 128, 0)
+        # Texture pixel colors encode their own coords
+        v, u = np.mgrid[0:640, 0:480]
+        self.texture = np.dstack((u & 255, v & 255, (u >> 8) | ((v >> 8) << 4))).astype(np.uint8)
+
+    def decode(self, colors):
+        r, g, b = np.int32(colors)
+        return r | ((b & 15) << 8), g | ((b >> 4) << 8)
+
+    def test_reproject_texture(self):
+        # Laser line seen at theta, texture taken 5 degrees before
+        theta, texture_theta = np.deg2rad(40.), np.deg2rad(35.)
+        heights = np.linspace(5, 150, 200)
+        direction = self.directions[1]
+        points = 60 * direction[:, np.newaxis] + np.vstack((0 * heights, 0 * heights, heights))
+        c, s = np.cos(-theta), np.sin(-theta)
+        point_cloud = np.dot(np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]]), points)
+        colors = self.ciclop_scan._reproject_texture(point_cloud, self.texture, texture_theta)
+        # Same surface points on the platform turned back by 5 degrees
+        a = texture_theta - theta
+        rz = np.array([[np.cos(a), -np.sin(a), 0], [np.sin(a), np.cos(a), 0], [0, 0, 1]])
+        u, v = project_line(self.calibration_data, rz.dot(direction), 60, heights)
+        self.assertFalse(np.allclose(u, project_line(self.calibration_data, direction, 60, heights)[0], atol=5))
+        cu, cv = self.decode(colors)
+        np.testing.assert_array_equal(cu, np.around(u))
+        np.testing.assert_array_equal(cv, np.around(v))
+
+    def test_reproject_outside_texture(self):
+        # Point far above the platform is out of texture frame, flat color
+        point_cloud = np.array([[0, 0], [-60, -60], [100, 2000.]])
+        colors = self.ciclop_scan._reproject_texture(point_cloud, self.texture, 0)
+        self.assertEqual(colors.shape, (3, 2))
+        self.assertEqual(colors[:, 1].tolist(), [255, 128, 0])
+        u, v = project_line(self.calibration_data, np.array([0, -1, 0]), 60, np.array([100.]))
+        cu, cv = self.decode(colors[:, :1])
+        self.assertEqual((cu[0], cv[0]), (np.around(u[0]), np.around(v[0])))
@@ -0,0 +1,23 @@
+import unittest
+import numpy as np
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.scan.current_video import CurrentVideo
+
+
+class CurrentVideoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.current_video = CurrentVideo()
+        self.current_video.mode = 'Line'
+
+    def test_line_keeps_columns(self):
+        # Column buffer is reused by scan right after set_line
+        image = np.full((60, 40, 3), 100, np.uint8)
+        columns = np.arange(60, dtype=np.intp) % 40
+        v = np.arange(60)
+        self.current_video.set_line([(columns, v), None], image)
+        columns[:] = 0
+        line = self.current_video.capture()
+        np.testing.assert_array_equal(line[v, np.arange(60) % 40], [[255, 50, 50]] * 60)
+        self.assertEqual(line[5, 0].tolist(), [50, 50, 50])
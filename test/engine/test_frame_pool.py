@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.driver.camera_usb import Camera_usb
+from horus.engine.driver.frame_pool import FramePool
+from horus.engine.scan.scan_capture import ScanCapture
+
+
+def address(buf):
+    return buf.__array_interface__['data'][0]
+
+
+class FramePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = FramePool(size=4)
+
+    def test_held_buffer_not_returned(self):
+        held = [self.pool.get((48, 64, 3)) for i in xrange(3)]
+        buf = self.pool.get((48, 64, 3))
+        self.assertFalse(any(np.shares_memory(buf, h) for h in held))
+        self.assertEqual(self.pool.allocated, 0)
+
+    def test_released_buffer_returned(self):
+        buf = self.pool.get((48, 64, 3))
+        data = address(buf)
+        del buf
+        self.assertEqual(address(self.pool.get((48, 64, 3))), data)
+
+    def test_view_keeps_buffer(self):
+        buf = self.pool.get((48, 64))
+        view = buf[10:20]
+        del buf
+        self.assertFalse(np.shares_memory(self.pool.get((48, 64)), view))
+
+    def test_capture_release(self):
+        capture = ScanCapture()
+        capture.texture = self.pool.get((48, 64, 3))
+        capture.lasers = [self.pool.get((48, 64, 3)) for i in xrange(3)]
+        data = set(address(buf) for buf in capture.lasers + [capture.texture])
+        buf = self.pool.get((48, 64, 3))
+        self.assertNotIn(address(buf), data)
+        capture.release()
+        reused = [self.pool.get((48, 64, 3)) for i in xrange(3)]
+        self.assertEqual(set(address(b) for b in reused + [buf]) - data, set([address(buf)]))
+
+    def test_eviction(self):
+        # Free buffer of other shape is replaced when pool is full
+        held = [self.pool.get((48, 64)) for i in xrange(3)]
+        buf = self.pool.get((48, 64))
+        del buf
+        buf = self.pool.get((64, 48))
+        self.assertEqual(self.pool.allocated, 0)
+        self.assertEqual(sorted(b.shape for b in self.pool._buffers),
+                         [(48, 64)] * 3 + [(64, 48)])
+
+    def test_exhausted(self):
+        held = [self.pool.get((48, 64)) for i in xrange(4)]
+        buf = self.pool.get((48, 64))
+        self.assertEqual(self.pool.allocated, 1)
+        self.assertFalse(any(b is buf for b in self.pool._buffers))
+
+    def test_set_size(self):
+        held = [self.pool.get((48, 64)) for i in xrange(4)]
+        self.pool.set_size(2)
+        self.assertEqual(len(self.pool._buffers), 2)
+
+
+class CameraLastImageTest(unittest.TestCase):
+
+    def test_updating_returns_copy(self):
+        # Frame returned during control update may be modified in place
+        camera = Camera_usb()
+        camera._is_connected = True
+        camera._updating = True
+        camera._last_image = np.full((48, 64, 3), 7, np.uint8)
+        image = camera.capture_image()
+        self.assertFalse(np.shares_memory(image, camera._last_image))
+        image[:] = 0
+        self.assertTrue(np.all(camera._last_image == 7))
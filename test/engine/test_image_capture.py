@@ -0,0 +1,74 @@
+import unittest
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.algorithms.image_capture import ImageCapture
+
+from fakes import FakeDriver
+
+
+class BackgroundReuseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image_capture = ImageCapture()
+        self.driver = FakeDriver()
+        self.drivers = {}
+        for obj in (self.image_capture, self.image_capture.texture_mode,
+                    self.image_capture.laser_mode, self.image_capture.pattern_mode):
+            self.drivers[obj] = obj.driver
+            obj.driver = self.driver
+        self.image_capture.stream = False
+        self.image_capture.control_latency = {}
+        self.image_capture.set_flush_values(0, 0, 0, 0)
+        self.image_capture.set_remove_background(True)
+        self.image_capture.texture_mode.exposure = 10
+        self.image_capture.laser_mode.exposure = 10
+
+    def tearDown(self):
+        for obj, driver in self.drivers.items():
+            obj.driver = driver
+        self.image_capture.set_background_policy('Never')
+
+    def backgrounds(self, steps, texture=True):
+        # Background of each scan step, texture taken before lasers
+        ret = []
+        for i in xrange(steps):
+            if texture:
+                self.image_capture.capture_texture()
+            ret.append(self.image_capture.capture_laser(0)[1])
+        return ret
+
+    def reused(self, backgrounds):
+        return [b is a for a, b in zip(backgrounds, backgrounds[1:])]
+
+    def test_never(self):
+        self.image_capture.set_background_policy('Never')
+        self.assertEqual(self.reused(self.backgrounds(4)), [False] * 3)
+
+    def test_steps(self):
+        self.image_capture.set_background_policy('Steps', 2)
+        self.assertEqual(self.reused(self.backgrounds(7)), [True, True, False, True, True, False])
+
+    def test_difference(self):
+        # Fake camera frame values differ by 2 or 3 between textures
+        self.image_capture.set_background_policy('Difference', 1, 10)
+        self.assertEqual(self.reused(self.backgrounds(4)), [True] * 3)
+        self.image_capture.set_background_policy('Difference', 1, 2)
+        self.assertEqual(self.reused(self.backgrounds(4)), [False] * 3)
+        self.assertFalse(self.image_capture._difference_fallback)
+
+    def test_difference_without_texture(self):
+        # Falls back to 'Steps' when no texture is taken for the capture
+        self.image_capture.set_background_policy('Difference', 2, 10)
+        self.assertEqual(self.reused(self.backgrounds(4, texture=False)), [True, True, False])
+        self.assertTrue(self.image_capture._difference_fallback)
+
+    def test_texture(self):
+        self.image_capture.set_background_policy('Texture')
+        self.image_capture.capture_texture()
+        texture = self.image_capture._texture
+        self.assertIs(self.image_capture.capture_laser(0)[1], texture)
+        # Texture taken with other camera settings is not used
+        self.image_capture.texture_mode.exposure = 20
+        self.image_capture.capture_texture()
+        texture = self.image_capture._texture
+        self.assertIsNot(self.image_capture.capture_laser(0)[1], texture)
@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+import scipy.ndimage
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.algorithms.laser_segmentation import LaserSegmentation
+
+
+def laser_image(height=120, width=160, seed=0):
+    # Synthetic laser stripe with gaps and noise
+    rng = np.random.RandomState(seed)
+    image = np.zeros((height, width), np.uint8)
+    rows = np.arange(height)
+    center = (width / 2 + width / 4 * np.sin(rows / 15.)).astype(int)
+    for offset in xrange(-3, 4):
+        image[rows, center + offset] = 200 - 25 * abs(offset)
+    image += rng.randint(0, 10, image.shape).astype(np.uint8)
+    image[rng.rand(height) < 0.1] = 0
+    return image
+
+
+class LaserSegmentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.laser_segmentation = LaserSegmentation()
+        self.laser_segmentation.calibration_data.set_resolution(160, 120)
+
+    def test_center_of_mass_kernels(self):
+        image = laser_image()
+        self.laser_segmentation.set_peak_kernel('Weight matrix')
+        s0, v0, u0 = self.laser_segmentation._center_of_mass(image)
+        self.laser_segmentation.set_peak_kernel('Index vector')
+        s1, v1, u1 = self.laser_segmentation._center_of_mass(image)
+        np.testing.assert_array_equal(s0, s1)
+        np.testing.assert_array_equal(v0, v1)
+        np.testing.assert_allclose(u0, u1, rtol=0, atol=1e-9)
+
+    def test_window_mask(self):
+        image = laser_image()
+        window = 5
+        self.laser_segmentation.set_window_enable(True)
+        self.laser_segmentation.set_window_value(window)
+
+        # Reference row by row implementation
+        peak = image.argmax(axis=1)
+        mask = np.zeros_like(image)
+        for i in xrange(image.shape[0]):
+            mask[i, max(peak[i] - window, 0):peak[i] + window + 1] = 255
+        expected = np.bitwise_and(image, mask)
+
+        np.testing.assert_array_equal(self.laser_segmentation._window_mask(image), expected)
+
+    def test_sgf(self):
+        rng = np.random.RandomState(1)
+        s = rng.randint(0, 3, 200)
+        s[50:53] = [0, 7, 0]
+        u = rng.uniform(0, 100, np.count_nonzero(s))
+
+        # Reference filter applied segment by segment
+        i = 0
+        expected = []
+        for segment in np.ma.clump_unmasked(np.ma.masked_equal(s, 0)):
+            j = segment.stop - segment.start
+            expected.append(scipy.ndimage.gaussian_filter(u[i:i + j], sigma=2.0))
+            i += j
+        expected = np.concatenate(expected)
+
+        np.testing.assert_allclose(self.laser_segmentation._sgf(u, s), expected, rtol=0, atol=1e-9)
+
+    def test_ransac_batch(self):
+        rng = np.random.RandomState(2)
+        v = np.arange(300)
+        u = 0.3 * v + 40 + rng.normal(0, 0.3, len(v))
+        u[rng.rand(len(v)) < 0.2] += rng.uniform(-50, 50)
+        data = np.vstack((v, u)).T
+        model = self.laser_segmentation.LinearLeastSquares2D()
+
+        np.random.seed(5)
+        expected = self.laser_segmentation.ransac(data, model, 2, 1)
+        np.random.seed(5)
+        result = self.laser_segmentation.ransac_batch(data, model, 2, 1)
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    def test_subpixel_peak(self):
+        # Gaussian stripe with known sub-pixel center
+        rows = np.arange(120)
+        center = 60 + 20 * np.sin(rows / 15.) + 0.37
+        columns = np.arange(160)
+        image = 250 * np.exp(-(columns - center[:, np.newaxis]) ** 2 / (2 * 2. ** 2))
+        image = np.rint(image).astype(np.uint8)
+        image[10:15] = 0
+        for method, tolerance in (('Parabolic', 0.2), ('Gaussian', 0.05), ('Blais-Rioux', 0.1)):
+            self.laser_segmentation.set_refinement_method(method)
+            s, v, u = self.laser_segmentation._subpixel_peak(image)
+            np.testing.assert_array_equal(v, np.where(image.max(axis=1) > 0)[0])
+            np.testing.assert_allclose(u, center[v], rtol=0, atol=tolerance)
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.algorithms.point_cloud_generation import PointCloudGeneration
+
+from helpers import setup_calibration
+
+
+class PointCloudGenerationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.point_cloud_generation = PointCloudGeneration()
+        self.calibration_data = self.point_cloud_generation.calibration_data
+        setup_calibration(self.calibration_data, distortion=[0.12, -0.25, 0.002, -0.001, 0.08], tilt=6)
+
+    def test_laser_lut(self):
+        # Interpolated lookup table against exact undistortion
+        width, height = self.calibration_data.width, self.calibration_data.height
+        rng = np.random.RandomState(0)
+        u = np.concatenate((rng.uniform(0, width - 1, 2000), [0, 0.5, width - 1.5, width - 1]))
+        v = np.concatenate((rng.randint(0, height, 2000), [0, height - 1, 7, height - 1]))
+        # Right laser, last column is within scan volume
+        plane = self.calibration_data.laser_planes[1]
+        self.assertIsNotNone(self.calibration_data.laser_lut(1))
+        lut = self.point_cloud_generation.compute_camera_point_cloud_lut((u, v), 1)
+        exact = self.point_cloud_generation.compute_camera_point_cloud(
+            (u, v), plane.distance, plane.normal)
+        self.assertEqual(lut.shape, (3, len(u)))
+        # Skip rays near parallel to laser plane, far outside scan volume
+        valid = (exact[2] > 100) & (exact[2] < 600)
+        self.assertTrue(valid[-1] and np.mean(valid) > 0.5)
+        # Interpolation error well below one pixel footprint (0.29 mm or more)
+        np.testing.assert_allclose(lut[:, valid], exact[:, valid], rtol=0, atol=0.01)
+        # Integer columns hit table entries
+        u = np.arange(width)
+        v = np.full(width, height / 2)
+        lut = self.point_cloud_generation.compute_camera_point_cloud_lut((u, v), 1)
+        exact = self.point_cloud_generation.compute_camera_point_cloud(
+            (u, v), plane.distance, plane.normal)
+        valid = (exact[2] > 100) & (exact[2] < 600)
+        np.testing.assert_allclose(lut[:, valid], exact[:, valid], rtol=1e-5, atol=1e-3)
+
+    def reference_point_cloud(self, theta, Xc):
+        # Xw = Rz(-theta) * (R.T * Xc - R.T * t)
+        R = np.matrix(self.calibration_data.platform_rotation)
+        t = np.matrix(self.calibration_data.platform_translation).T
+        c, s = np.cos(-theta), np.sin(-theta)
+        Rz = np.matrix([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+        return np.array(Rz * (R.T * Xc - R.T * t))
+
+    def check_transforms(self, motor_step, thetas):
+        rng = np.random.RandomState(1)
+        Xc = np.matrix(rng.uniform(-100, 100, (3, 50)) + [[0], [0], [320]])
+        self.point_cloud_generation.set_motor_step(motor_step)
+        for theta in thetas:
+            T = self.point_cloud_generation.get_transform(theta)
+            Xw = np.dot(T[:, :3], Xc) + T[:, 3:]
+            np.testing.assert_allclose(Xw, self.reference_point_cloud(theta, Xc), rtol=0, atol=1e-3)
+
+    def test_transforms_step_grid(self):
+        self.point_cloud_generation.set_motor_step(0.45)
+        transforms = self.point_cloud_generation._compute_transforms()
+        self.assertEqual(len(transforms), 801)
+        thetas = np.deg2rad(np.arange(0, 801, 37) * 0.45)
+        self.check_transforms(0.45, thetas)
+        # Cached transform is returned on the step grid
+        T = self.point_cloud_generation.get_transform(thetas[3])
+        self.assertTrue(np.shares_memory(T, transforms))
+
+    def test_transforms_off_grid(self):
+        thetas = np.deg2rad([0.2, 13.001, 90.1, 359.9, 360.3, -0.45])
+        self.check_transforms(0.45, thetas)
+        T = self.point_cloud_generation.get_transform(thetas[0])
+        self.assertFalse(np.shares_memory(T, self.point_cloud_generation._compute_transforms()))
+
+    def test_transforms_negative_step(self):
+        thetas = np.deg2rad(np.arange(0, 401, 23) * -0.9)
+        self.check_transforms(-0.9, thetas)
+        self.check_transforms(-0.9, np.deg2rad([-0.3, 45.0, -180.2]))
+        # Extrinsics change drops cached transforms
+        self.calibration_data.platform_translation = np.array([-3., 75., 310.])
+        self.check_transforms(-0.9, thetas)
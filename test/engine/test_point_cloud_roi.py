@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+
+import horus.gui.engine  # resolve engine <-> gui import order
+from horus.engine.calibration.calibration_data import CalibrationData
+from horus.engine.algorithms.point_cloud_roi import PointCloudROI
+from horus.engine.algorithms.laser_segmentation import LaserSegmentation
+
+from helpers import setup_calibration, project_line
+
+
+class PointCloudROITest(unittest.TestCase):
+
+    def setUp(self):
+        self.calibration_data = CalibrationData()
+        self.directions = setup_calibration(self.calibration_data)
+        self.point_cloud_roi = PointCloudROI()
+        self.point_cloud_roi.set_use_roi(True)
+        self.point_cloud_roi.set_height(200)
+        self.point_cloud_roi.set_diameter(200)
+
+    def test_exclusive_bounds_planes_through_axis(self):
+        heights = np.linspace(1, 199, 400)
+        masks = [self.point_cloud_roi.get_laser_bounds(i, True)[3] for i in xrange(2)]
+        self.assertFalse(np.any((masks[0] > 0) & (masks[1] > 0)))
+        for i in xrange(2):
+            u, v = project_line(self.calibration_data, self.directions[i], 60, heights)
+            u, v = np.rint(u).astype(int), np.rint(v).astype(int)
+            self.assertTrue(np.mean(masks[i][v, u] > 0) > 0.95)
+            self.assertFalse(np.any(masks[1 - i][v, u] > 0))
+
+    def test_exclusive_segmentation(self):
+        # Both laser lines in one image, each laser keeps its own rows
+        laser_segmentation = LaserSegmentation()
+        laser_segmentation.set_refinement_method('None')
+        laser_segmentation.set_threshold_enable(False)
+        laser_segmentation.set_window_enable(False)
+        laser_segmentation.set_roi_crop(True)
+        heights = np.linspace(1, 199, 2000)
+        images = [np.zeros((640, 480), np.uint8) for i in xrange(2)]
+        for i in xrange(2):
+            u, v = project_line(self.calibration_data, self.directions[i], 60, heights)
+            images[i][np.rint(v).astype(int), np.rint(u).astype(int)] = 255
+        image = np.maximum(images[0], images[1])
+        for i in xrange(2):
+            (u, v), _ = laser_segmentation.compute_2d_points(images[i], i)
+            (ue, ve), _ = laser_segmentation.compute_2d_points(image, i, True)
+            self.assertTrue(len(ve) > 0.95 * len(v))
+            line = dict(zip(v, u))
+            np.testing.assert_allclose(ue, [line[r] for r in ve], atol=0.5)
+
+    def test_cropped_segmentation(self):
+        # Scan path keeps ROI laser image, GUI path places it into full frame
+        laser_segmentation = LaserSegmentation()
+        laser_segmentation.set_refinement_method('None')
+        laser_segmentation.set_threshold_enable(False)
+        laser_segmentation.set_window_enable(False)
+        laser_segmentation.set_roi_crop(True)
+        image = np.zeros((640, 480), np.uint8)
+        u, v = project_line(self.calibration_data, self.directions[0], 60, np.linspace(1, 199, 2000))
+        image[np.rint(v).astype(int), np.rint(u).astype(int)] = 255
+        (u, v), full = laser_segmentation.compute_2d_points(image, 0)
+        (uc, vc), cropped, (du, dv) = laser_segmentation.compute_2d_points_cropped(image, 0)
+        np.testing.assert_array_equal(uc, u)
+        np.testing.assert_array_equal(vc, v)
+        self.assertTrue(cropped.size < full.size)
+        h, w = cropped.shape
+        np.testing.assert_array_equal(full[dv:dv + h, du:du + w], cropped)
+        self.assertEqual(np.count_nonzero(full), np.count_nonzero(cropped))
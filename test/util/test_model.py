@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from horus.util import model
+from horus.util.mesh_loaders import ply
+
+
+def point_clouds(count=40, size=300, seed=0):
+    # Scan slices: points, colors and (laser index, slice no, slice angle)
+    rng = np.random.RandomState(seed)
+    return [((rng.rand(size, 3) * 100).astype(np.float32),
+             rng.randint(0, 255, (size, 3)).astype(np.uint8),
+             (k % 2, k // 2, np.float32(k * 0.0039)))
+            for k in xrange(count)]
+
+
+class MeshTest(unittest.TestCase):
+
+    def test_add_pointcloud_growth(self):
+        clouds = point_clouds()
+        mesh = model.Mesh()._prepare_vertex_count(500)
+        capacities = set()
+        for vertexes, colors, meta in clouds:
+            mesh.add_pointcloud(vertexes, colors, meta=meta)
+            capacities.add(len(mesh.vertexes))
+            self.assertEqual(len(mesh.colors), len(mesh.vertexes))
+            self.assertEqual(len(mesh.vertexes_meta), len(mesh.vertexes))
+        # Geometric growth reallocates a few times only
+        self.assertTrue(len(capacities) <= 6)
+        self.assertTrue(len(mesh.vertexes) >= mesh.vertex_count)
+        self.assertEqual(mesh.vertex_count, 40 * 300)
+        np.testing.assert_array_equal(mesh.get_vertexes(), np.vstack([c[0] for c in clouds]))
+        np.testing.assert_array_equal(mesh.get_colors(), np.vstack([c[1] for c in clouds]))
+        meta = mesh.get_meta()
+        np.testing.assert_array_equal(meta['laser_id'], np.repeat([c[2][0] for c in clouds], 300))
+        np.testing.assert_array_equal(meta['slice_no'], np.repeat([c[2][1] for c in clouds], 300))
+        np.testing.assert_array_equal(meta['slice_l'], np.repeat([c[2][2] for c in clouds], 300))
+
+    def test_add_vertex_growth(self):
+        mesh = model.Mesh()
+        for i in xrange(2000):
+            mesh._add_vertex(i, 2 * i, 3 * i, 1, 2, 3, 0, i, 0.5)
+        self.assertEqual(mesh.vertex_count, 2000)
+        np.testing.assert_array_equal(mesh.get_vertexes()[:, 1], 2 * np.arange(2000))
+        np.testing.assert_array_equal(mesh.get_meta()['slice_no'], np.arange(2000))
+
+
+class PlyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_binary_round_trip(self):
+        mesh = model.Mesh()._prepare_vertex_count(100)
+        for vertexes, colors, meta in point_clouds(count=6):
+            mesh.add_pointcloud(vertexes, colors, meta=meta)
+        mesh.add_pointcloud(*point_clouds(count=1, seed=1)[0][:2])
+        mesh.metadata = {'motor_step': 0.45}
+        filename = os.path.join(self.path, 'scan.ply')
+        ply.save_scene(filename, mesh)
+
+        loaded = ply.load_scene(filename)._mesh
+        self.assertEqual(loaded.vertex_count, mesh.vertex_count)
+        np.testing.assert_array_equal(loaded.get_vertexes(), mesh.get_vertexes())
+        np.testing.assert_array_equal(loaded.get_colors(), mesh.get_colors())
+        meta, loaded_meta = mesh.get_meta(), loaded.get_meta()
+        for name in ('laser_id', 'slice_no', 'slice_l'):
+            np.testing.assert_array_equal(loaded_meta[name], meta[name])
+        self.assertEqual(loaded.metadata, mesh.metadata)